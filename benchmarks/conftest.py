@@ -0,0 +1,46 @@
+import random
+import sys
+from pathlib import Path
+import pytest
+
+REPOSITORY = Path(__file__).resolve().parent.parent
+STUBS = Path(__file__).resolve().parent / "stubs"
+
+if str(REPOSITORY) not in sys.path:
+    sys.path.insert(0, str(REPOSITORY))
+
+# The package imports nothing until it is registered, so its bpy-free
+# modules can be imported without Blender.
+from shape_tree.app import model
+
+NODE_COUNT = 10000
+
+
+def synthetic_depths(count: int, seed: int=0, max_depth: int=6):
+    # Depth-first depths where each node is at most one level below the last
+    rng = random.Random(seed)
+    result = [0]
+    while len(result) < count:
+        depth = result[-1]
+        roll = rng.random()
+        if roll < 0.4 and depth < max_depth:
+            depth += 1
+        elif roll > 0.7:
+            depth = rng.randint(0, depth)
+        result.append(depth)
+    return result
+
+
+@pytest.fixture(scope="session")
+def depths():
+    return synthetic_depths(NODE_COUNT)
+
+
+@pytest.fixture(scope="session")
+def names(depths):
+    return [f'Key_{index:05d}' for index in range(len(depths))]
+
+
+@pytest.fixture
+def tree(names, depths):
+    return model.ShapeTreeModel(names, depths)
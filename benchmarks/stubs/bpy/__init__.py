@@ -0,0 +1,6 @@
+# Minimal stand-in for Blender's bpy module, enough to import and register
+# the add-on outside of Blender for import-time benchmarks. Not a mock of
+# Blender's behaviour, nothing here does any work.
+from . import app, props, types, utils
+
+data = None
@@ -0,0 +1,3 @@
+from . import handlers, timers
+
+version = (3, 0, 0)
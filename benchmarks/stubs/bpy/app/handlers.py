@@ -0,0 +1,9 @@
+depsgraph_update_post = []
+frame_change_post = []
+load_post = []
+redo_post = []
+undo_post = []
+
+
+def persistent(function):
+    return function
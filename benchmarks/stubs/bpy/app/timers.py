@@ -0,0 +1,10 @@
+def is_registered(function) -> bool:
+    return False
+
+
+def register(function, first_interval: float=0.0) -> None:
+    pass
+
+
+def unregister(function) -> None:
+    pass
@@ -0,0 +1,14 @@
+def _property(name: str):
+    def function(**kwargs):
+        return (function, kwargs)
+    function.__name__ = name
+    return function
+
+
+BoolProperty = _property("BoolProperty")
+CollectionProperty = _property("CollectionProperty")
+EnumProperty = _property("EnumProperty")
+FloatProperty = _property("FloatProperty")
+IntProperty = _property("IntProperty")
+PointerProperty = _property("PointerProperty")
+StringProperty = _property("StringProperty")
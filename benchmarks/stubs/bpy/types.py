@@ -0,0 +1,19 @@
+_types = {}
+
+
+class bpy_struct:
+    pass
+
+
+class bpy_prop_collection:
+    pass
+
+
+def __getattr__(name: str) -> type:
+    if name.startswith("__"):
+        raise AttributeError(name)
+    try:
+        return _types[name]
+    except KeyError:
+        result = _types[name] = type(name, (bpy_struct,), {})
+        return result
@@ -0,0 +1,6 @@
+def register_class(cls: type) -> None:
+    pass
+
+
+def unregister_class(cls: type) -> None:
+    pass
@@ -0,0 +1 @@
+from . import io_utils
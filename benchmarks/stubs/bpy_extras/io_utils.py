@@ -0,0 +1,6 @@
+class ExportHelper:
+    pass
+
+
+class ImportHelper:
+    pass
@@ -0,0 +1,4 @@
+# Minimal stand-ins for the lib submodules (asks, events and driver_utils),
+# appended to shape_tree.lib's search path by the registration benchmark
+# when the submodules are not checked out. Like the bpy stub, nothing here
+# does any work.
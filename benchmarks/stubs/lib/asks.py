@@ -0,0 +1,30 @@
+from typing import Generic, TypeVar
+
+COMPAT_ENGINES = {'BLENDER_EEVEE', 'BLENDER_WORKBENCH', 'CYCLES'}
+COMPAT_OBJECTS = {'MESH', 'LATTICE', 'CURVE', 'SURFACE'}
+
+T = TypeVar("T")
+
+
+class ASKSComponent:
+    pass
+
+
+class ASKSNamespace(Generic[T]):
+    pass
+
+
+def idprop_create(*args, **kwargs) -> None:
+    pass
+
+
+def split_layout(*args, **kwargs) -> None:
+    pass
+
+
+def register(namespace: str) -> None:
+    pass
+
+
+def unregister() -> None:
+    pass
@@ -0,0 +1,9 @@
+from dataclasses import dataclass
+
+
+class Event:
+    pass
+
+
+def dispatch_event(event: Event) -> None:
+    pass
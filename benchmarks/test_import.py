@@ -0,0 +1,95 @@
+import os
+import subprocess
+import sys
+from operator import itemgetter
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from conftest import REPOSITORY, STUBS
+import shape_tree
+
+
+def importtime(statement: str):
+    # Cumulative import times in microseconds from a fresh interpreter, with
+    # the bpy stub standing in for Blender.
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join((str(REPOSITORY), str(STUBS))))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            env=env,
+                            capture_output=True,
+                            text=True,
+                            check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:"):
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_import_package(benchmark):
+    times = benchmark.pedantic(importtime, ("import shape_tree",), rounds=5)
+    assert "bpy" not in times
+    assert [name for name in times if name.startswith("shape_tree")] == ["shape_tree"]
+    benchmark.extra_info["shape_tree_us"] = times["shape_tree"]
+
+
+# Only the handlers and what the property groups need at class creation
+# load with the add-on, the rest of app loads on first use
+REGISTER_MODULES = {
+    "shape_tree.app",
+    "shape_tree.app.handlers",
+    "shape_tree.app.model",
+    "shape_tree.app.navigation",
+    "shape_tree.app.profiling",
+    }
+
+
+def register_statement() -> str:
+    # Falls back to the lib stubs when the submodules are not checked out
+    if (REPOSITORY / "shape_tree" / "lib" / "asks" / "__init__.py").exists():
+        return "import shape_tree; shape_tree.register()"
+    return ("import shape_tree.lib; "
+            f'shape_tree.lib.__path__.append({str(STUBS / "lib")!r}); '
+            "import shape_tree; shape_tree.register()")
+
+
+def test_import_register(benchmark):
+    times = benchmark.pedantic(importtime, (register_statement(),), rounds=5)
+    modules = sorted(((name, time) for name, time in times.items() if name.startswith("shape_tree.")),
+                     key=itemgetter(1),
+                     reverse=True)
+    benchmark.extra_info["slowest_modules_us"] = dict(modules[:10])
+    assert {name for name in times if name.startswith("shape_tree.app")} <= REGISTER_MODULES
+    assert "numpy" not in times
+
+
+def synthetic_modules():
+    modules = {f'package_{index}.module_{index % 7}': None for index in range(4000)}
+    modules.update((f'shape_tree.module_{index}', None) for index in range(40))
+    modules["shape_tree"] = None
+    modules["shape_tree_other"] = None
+    return modules
+
+
+def modules_purge_sorted(modules: dict, name: str) -> None:
+    # Previous implementation, kept as a baseline
+    for key in dict(sorted(modules.items(), key=itemgetter(0))).keys():
+        if key.startswith(name):
+            del modules[key]
+
+
+@pytest.mark.parametrize("purge", [shape_tree.modules_purge, modules_purge_sorted], ids=["prefix", "sorted"])
+def test_modules_purge(benchmark, purge):
+    modules = synthetic_modules()
+
+    def setup():
+        return (dict(modules), "shape_tree"), {}
+
+    benchmark.pedantic(purge, setup=setup, rounds=200)
+
+    result = dict(modules)
+    shape_tree.modules_purge(result, "shape_tree")
+    assert not any(key == "shape_tree" or key.startswith("shape_tree.") for key in result)
+    assert "shape_tree_other" in result
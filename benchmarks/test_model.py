@@ -0,0 +1,191 @@
+import random
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from conftest import NODE_COUNT, model
+
+
+class ListCollection(list):
+    # A list with the move(from, to) of a bpy collection
+
+    def move(self, source: int, target: int) -> None:
+        self.insert(target, self.pop(source))
+
+
+def naive_parent(depths, index):
+    depth = depths[index]
+    for other in range(index - 1, -1, -1):
+        if depths[other] < depth:
+            return other
+    return -1
+
+
+def naive_subtree_end(depths, index):
+    end = index + 1
+    while end < len(depths) and depths[end] > depths[index]:
+        end += 1
+    return end
+
+
+def test_build(benchmark, names, depths):
+    result = benchmark(model.ShapeTreeModel, names, depths)
+    assert len(result) == NODE_COUNT
+    for index in random.Random(1).sample(range(NODE_COUNT), 200):
+        assert result.parent[index] == naive_parent(depths, index)
+        assert result.subtree_end[index] == naive_subtree_end(depths, index)
+
+
+def test_insert(benchmark, names, depths):
+    # 100 nodes appended to the collection and moved under a parent in one
+    # batch, then the model rebuilt as it is after every structural edit
+    def setup():
+        return (ListCollection(zip(names, depths)),), {}
+
+    def insert(items):
+        tree = model.ShapeTreeModel(*zip(*items))
+        parent = tree.position("Key_05000")
+        index = tree.insert_position(parent)
+        start = len(items)
+        items.extend((f'Inserted_{offset:03d}', depths[parent] + 1) for offset in range(100))
+        model.block_move(items, start, len(items), index)
+        return model.ShapeTreeModel(*zip(*items)), parent, index
+
+    tree, parent, index = benchmark.pedantic(insert, setup=setup, rounds=20)
+    assert tree.position("Inserted_000") == index
+    assert tree.last_child(parent) == tree.position("Inserted_099")
+    assert all(tree.parent[tree.position(f'Inserted_{offset:03d}')] == parent for offset in range(100))
+
+
+def test_insert_single(benchmark, names, depths):
+    # 100 nodes added one at a time as the operators do, with the model
+    # updated in place instead of rebuilt after every add
+    def setup():
+        return (model.ShapeTreeModel(names, depths),), {}
+
+    def insert(tree):
+        parent = tree.position("Key_05000")
+        for offset in range(100):
+            tree.insert(f'Inserted_{offset:03d}', parent)
+        return tree, parent
+
+    tree, parent = benchmark.pedantic(insert, setup=setup, rounds=20)
+    rebuilt = model.ShapeTreeModel(tree.names, tree.depth)
+    assert tree.parent == rebuilt.parent
+    assert tree.subtree_end == rebuilt.subtree_end
+    assert tree.next_sibling == rebuilt.next_sibling
+    assert tree.last_child(parent) == tree.position("Inserted_099")
+
+
+def test_move(benchmark, names, depths):
+    # Moves the largest root subtree to the end of the tree and back
+    tree = model.ShapeTreeModel(names, depths)
+    roots = [index for index in range(len(tree)) if tree.parent[index] == -1]
+    root = max(roots, key=lambda index: len(tree.subtree(index)))
+    end = tree.subtree_end[root]
+
+    def setup():
+        return (ListCollection(names),), {}
+
+    def move(items):
+        index = model.block_move(items, root, end, len(items))
+        return items, index, model.block_move(items, index, len(items), root)
+
+    items, index, restored = benchmark.pedantic(move, setup=setup, rounds=20)
+    assert index == len(names) - (end - root)
+    assert restored == root
+    assert items == names
+
+
+def test_subtree(benchmark, tree):
+    roots = [index for index in range(len(tree)) if tree.parent[index] == -1]
+
+    def subtrees():
+        return sum(len(tree.subtree(index)) for index in roots)
+
+    assert benchmark(subtrees) == NODE_COUNT
+
+
+def test_parent_lookup(benchmark, tree, names):
+    sample = random.Random(2).sample(names, 1000)
+
+    def lookup():
+        parent = tree.parent
+        position = tree.position
+        return [parent[position(name)] for name in sample]
+
+    result = benchmark(lookup)
+    assert result == [tree.parent[tree.position(name)] for name in sample]
+
+
+def test_children(benchmark, tree):
+    def children():
+        return sum(tree.length(index) for index in range(len(tree)))
+
+    assert benchmark(children) == sum(1 for index in range(len(tree)) if tree.parent[index] != -1)
+
+
+def test_filter_items_expanded(benchmark, tree):
+    collapsed = set(random.Random(3).sample(range(NODE_COUNT), 500))
+    flags = benchmark(tree.visibility, 1, lambda index: index not in collapsed)
+    for index, flag in enumerate(flags):
+        hidden = any(ancestor in collapsed for ancestor in tree.ancestors(index))
+        assert flag == (0 if hidden else 1)
+
+
+def test_filter_items_pattern(benchmark, tree):
+    names = [name.lower() for name in tree.names]
+    codes = [index % 2 for index in range(NODE_COUNT)]
+
+    def filter_items():
+        return tree.visibility(1, bool, tree.match("key_0*1", frozenset({1}), codes, names=names))
+
+    flags = benchmark(filter_items)
+    for index in tree.match("key_0*1", frozenset({1}), codes, names=names):
+        assert flags[index] and all(flags[ancestor] for ancestor in tree.ancestors(index))
+
+
+def test_unique_name(benchmark, names):
+    taken = names + ["Group"] + [f'Group.{index:03d}' for index in range(1, 1000)]
+
+    def unique():
+        registry = model.ShapeTreeNameRegistry(taken)
+        result = []
+        for _ in range(100):
+            value = registry.unique("Group")
+            registry.add(value)
+            result.append(value)
+        return result
+
+    result = benchmark(unique)
+    assert result[0] == "Group.1000"
+    assert len(set(result)) == 100
+
+
+def test_rename(benchmark, names, depths):
+    tree = model.ShapeTreeModel(names, depths)
+
+    def rename():
+        tree.rename("Key_00042", "Renamed")
+        tree.rename("Renamed", "Key_00042")
+
+    benchmark(rename)
+    assert tree.position("Key_00042") == 42
+    assert tree.names[42] == "Key_00042"
+
+
+def test_rename_all(benchmark, names):
+    # 500 nodes renamed to a new convention, the first 100 new names already
+    # held by nodes that are not renamed
+    selected = names[:500]
+    taken = names + [f'{index:03d}_L' for index in range(100)]
+
+    def rename_all():
+        replace = model.name_replacer("Key_00*", "*_L")
+        registry = model.ShapeTreeNameRegistry(taken)
+        return registry.rename_all(selected, [replace(name) for name in selected], [1] * len(selected))
+
+    result = benchmark(rename_all)
+    assert len(set(result)) == 500
+    assert result[0] == "000_L.001"
+    assert result[100] == "100_L"
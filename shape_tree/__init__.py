@@ -31,38 +31,81 @@ bl_info = {
 
 UPDATE_URL = ""
 
-from .api.node import ShapeTreeNode
-from .api.tree import ShapeTree
-from .ops.add import (SHAPETREE_OT_group_add,
-                      SHAPETREE_OT_shapekey_add,
-                      SHAPETREE_OT_node_add)
-from .gui.tree import SHAPETREE_UL_tree
-from .gui.main import SHAPETREE_PT_main
+# Add-on modules are imported on registration rather than with the package,
+# which keeps the package itself importable without bpy.
 
 
 def classes():
+    from .api.node import ShapeTreeNode
+    from .api.tree import ShapeTree
+    from .ops.add import (SHAPETREE_OT_group_add,
+                          SHAPETREE_OT_shapekey_add,
+                          SHAPETREE_OT_nodes_add,
+                          SHAPETREE_OT_node_add)
+    from .ops.bake import SHAPETREE_OT_bake
+    from .ops.drivers import SHAPETREE_OT_drivers_convert
+    from .ops.generate import (SHAPETREE_OT_combinations_add,
+                               SHAPETREE_OT_xyz_split,
+                               SHAPETREE_OT_inbetweens_add)
+    from .ops.move import SHAPETREE_OT_node_move, SHAPETREE_OT_node_reparent
+    from .ops.profile import SHAPETREE_OT_profile_toggle, SHAPETREE_OT_profile_report
+    from .ops.remove import SHAPETREE_OT_node_remove
+    from .ops.rename import SHAPETREE_OT_nodes_rename
+    from .ops.snapshot import SHAPETREE_OT_snapshot_export, SHAPETREE_OT_snapshot_import
+    from .ops.validate import SHAPETREE_OT_validate
+    from .gui.tree import SHAPETREE_UL_tree
+    from .gui.main import SHAPETREE_PT_main
+    from .gui.profile import SHAPETREE_PT_profile
     return [
         ShapeTreeNode,
         ShapeTree,
         SHAPETREE_OT_group_add,
         SHAPETREE_OT_shapekey_add,
+        SHAPETREE_OT_nodes_add,
         SHAPETREE_OT_node_add,
+        SHAPETREE_OT_bake,
+        SHAPETREE_OT_drivers_convert,
+        SHAPETREE_OT_combinations_add,
+        SHAPETREE_OT_xyz_split,
+        SHAPETREE_OT_inbetweens_add,
+        SHAPETREE_OT_node_move,
+        SHAPETREE_OT_node_reparent,
+        SHAPETREE_OT_node_remove,
+        SHAPETREE_OT_nodes_rename,
+        SHAPETREE_OT_profile_toggle,
+        SHAPETREE_OT_profile_report,
+        SHAPETREE_OT_snapshot_export,
+        SHAPETREE_OT_snapshot_import,
+        SHAPETREE_OT_validate,
         SHAPETREE_UL_tree,
         SHAPETREE_PT_main,
+        SHAPETREE_PT_profile,
     ]
 
 
+def modules_purge(modules: dict, name: str) -> None:
+    # Only the package and its submodules, without sorting every loaded module
+    prefix = f'{name}.'
+    for key in [key for key in modules if key.startswith(prefix)]:
+        del modules[key]
+    modules.pop(name, None)
+
+
 def register():
     from bpy.types import Key
     from bpy.props import PointerProperty
     from bpy.utils import register_class
     from .lib import asks
+    from .api.tree import ShapeTree
+    from .app import handlers
 
     asks.register("shape_tree")
 
     for cls in classes():
         register_class(cls)
 
+    handlers.register()
+
     Key.shape_tree = PointerProperty(
         name="Shape Tree",
         type=ShapeTree,
@@ -72,11 +115,14 @@ def register():
 
 def unregister():
     import sys
-    from operator import itemgetter
     from bpy.types import Key
     from bpy.utils import unregister_class
     from .lib import asks
+    from .app import handlers
+    from .app.profiling import profile_disable
 
+    profile_disable()
+    handlers.unregister()
     asks.unregister()
 
     try:
@@ -86,9 +132,4 @@ def unregister():
     for cls in reversed(classes()):
         unregister_class(cls)
 
-    modules_ = sys.modules 
-    modules_ = dict(sorted(modules_.items(), key=itemgetter(0)))
-   
-    for name in modules_.keys():
-        if name.startswith(__name__):
-            del sys.modules[name]
+    modules_purge(sys.modules, __name__)
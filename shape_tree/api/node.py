@@ -1,11 +1,16 @@
 
-from typing import List, Optional, TYPE_CHECKING, Union
+from typing import List, Optional, Tuple, TYPE_CHECKING, Union
 from bpy.types import PropertyGroup
 from bpy.props import BoolProperty, EnumProperty, IntProperty, StringProperty
 from ..lib.asks import ASKSComponent
-from ..lib.events import dataclass, dispatch_event, Event
+from ..lib.events import dataclass, Event
+from ..app.navigation import tree_index, tree_index_rename
+from ..app.profiling import profiled
 if TYPE_CHECKING:
     from bpy.types import Key, ShapeKey
+    from ..app.deltas import ShapeTreeDelta
+    from ..app.validation import ShapeTreeIssue
+    from .tree import ShapeTree
 
 NODE_TYPE_ITEMS = [
     ('GROUP', "Group", ""),
@@ -45,6 +50,13 @@ def can_use_shapekey(key: 'Key') -> bool:
     return True
 
 
+# Collections of the add-ons that own the data of other node types
+NODE_TYPE_DATA = {
+    'XYZ': "split_xyz",
+    'COMBINATION': "combination_shape_keys",
+    'INBETWEEN': "in_betweens",
+    }
+
 NODE_TYPE_VALID = {
     'GROUP': can_use_group,
     'XYZ': can_use_xyz,
@@ -61,6 +73,12 @@ class ShapeTreeNodeNameUpdateEvent(Event):
     previous_value: str
 
 
+def node_is_generated(node: 'ShapeTreeNode') -> bool:
+    # Nodes of other add-ons' types that were generated by the tree itself,
+    # with no add-on entry. The tree drives their shape key values.
+    return node.type in NODE_TYPE_DATA and node.data is None
+
+
 def node_data_path(node: 'ShapeTreeNode') -> str:
     return node.get("data_path", "") if node.type != 'GROUP' else node.path_from_id()
 
@@ -69,8 +87,17 @@ def node_depth(node: 'ShapeTreeNode') -> int:
     return node.get("depth", 0)
 
 
+def node_extent(node: 'ShapeTreeNode') -> int:
+    # Derived from the tree index like node_index, so there is no stored
+    # extent that can fall out of step with the structure.
+    index = tree_index(node.id_data.shape_tree)
+    return index.extent(index.position(node.name))
+
+
 def node_index(node: 'ShapeTreeNode') -> int:
-    return node.get("index", 0)
+    # Derived from the cached tree index, so that structural edits don't have
+    # to rewrite a stored index on every node that follows them.
+    return tree_index(node.id_data.shape_tree).position(node.name)
 
 
 def node_name(node: 'ShapeTreeNode') -> str:
@@ -78,19 +105,29 @@ def node_name(node: 'ShapeTreeNode') -> str:
 
 
 def node_name_set(node: 'ShapeTreeNode', value: str) -> None:
+    from ..app.events import event_node_rename
+    from ..app.names import tree_names_rename
+    from ..app.search import tree_search_rename
+    tree = node.id_data.shape_tree
     cache = node_name(node)
-    node["name"] = node_name_unique(node, value)
-    dispatch_event(ShapeTreeNodeNameUpdateEvent(node, value, cache))
-
-
-def node_name_unique(node: 'ShapeTreeNode', name: str) -> str:
-    index = 0
-    value = name
-    names = list(node.id_data.key_blocks.keys())
-    names.extend(node.id_data.shape_tree.collection__internal__.keys())
-    while value in names:
-        index += 1
-        value = f'{name}.{str(index).zfill(3)}'
+    name = node_name_unique(node, value)
+    node["name"] = name
+    tree_names_rename(tree, cache, name)
+    tree_index_rename(tree, cache, name)
+    tree_search_rename(tree, name)
+    event_node_rename(tree, cache, name, value)
+
+
+@profiled
+def node_name_unique(node: Union['ShapeTree', 'ShapeTreeNode'], name: str) -> str:
+    from ..app.names import tree_names
+    key = node.id_data
+    tree = key.shape_tree
+    value = tree_names(tree).unique(name)
+    # Shape keys can be renamed outside of the tree without the registry
+    # knowing, so check the result and start over if it is out of date.
+    if value in key.key_blocks or value in tree.collection__internal__:
+        value = tree_names(tree, rebuild=True).unique(name)
     return value
 
 
@@ -98,31 +135,26 @@ def node_type(node: 'ShapeTreeNode') -> int:
     return node.get("type", 0)
 
 
+def node_show_expanded_update(node: 'ShapeTreeNode', context) -> None:
+    from ..app.visibility import node_show_expanded_update
+    node_show_expanded_update(node, context)
+
+
 class ShapeTreeNode(ASKSComponent, PropertyGroup):
 
     @property
+    @profiled
     def ancestors(self) -> List['ShapeTreeNode']:
-        data = []
-        node = self.parent
-        while node is not None:
-            data.append(node)
-            node = node.parent
-        return data
+        nodes = self.id_data.shape_tree.collection__internal__
+        index = tree_index(self.id_data.shape_tree)
+        return [nodes[i] for i in index.ancestors(index.position(self.name))]
 
     @property
+    @profiled
     def children(self) -> List['ShapeTreeNode']:
-        result = []
         nodes = self.id_data.shape_tree.collection__internal__
-        depth = self.depth + 1
-        index = self.index + 1
-        count = len(nodes)
-        while index < count:
-            node = nodes[index]
-            node_depth = node.depth
-            if node_depth < depth: break
-            if node_depth == depth: result.append(node)
-            index += 1
-        return result
+        index = tree_index(self.id_data.shape_tree)
+        return [nodes[i] for i in index.children(index.position(self.name))]
 
     data_path: StringProperty(
         name="Data Path",
@@ -139,6 +171,11 @@ class ShapeTreeNode(ASKSComponent, PropertyGroup):
         except ValueError: pass
         return None
 
+    @property
+    def delta(self) -> Optional['ShapeTreeDelta']:
+        from ..app.deltas import node_delta
+        return node_delta(self)
+
     depth: IntProperty(
         name="Depth",
         description="The depth of the node in the tree (read-only)",
@@ -147,8 +184,17 @@ class ShapeTreeNode(ASKSComponent, PropertyGroup):
         )
 
     @property
+    @profiled
     def first_child(self) -> Optional['ShapeTreeNode']:
-        return self.children[0] if len(self) > 0 else None
+        if len(self) > 0:
+            return self.id_data.shape_tree.collection__internal__[node_index(self) + 1]
+
+    extent: IntProperty(
+        name="Extent",
+        description="The number of descendants of the node in the tree (read-only)",
+        get=node_extent,
+        options=set()
+        )
 
     index: IntProperty(
         name="Index",
@@ -157,24 +203,35 @@ class ShapeTreeNode(ASKSComponent, PropertyGroup):
         options=set()
         )
 
+    @property
+    def issues(self) -> Tuple['ShapeTreeIssue', ...]:
+        from ..app.validation import node_issues
+        return node_issues(self)
+
     @property
     def is_shape(self) -> bool:
         return self.type in {'SHAPEKEY', 'COMBINATION', 'XYZ', 'INBETWEEN'}
 
     @property
     def is_valid(self) -> bool:
-        return not self.is_shape or self.name in self.id_data.key_blocks
+        from ..app.validation import node_issues
+        return not any(issue.severity == 'ERROR' for issue in node_issues(self))
 
     @property
+    @profiled
     def last_child(self) -> Optional['ShapeTreeNode']:
-        if len(self):
-            return self.children[-1]
+        index = tree_index(self.id_data.shape_tree)
+        index = index.last_child(index.position(self.name))
+        if index != -1:
+            return self.id_data.shape_tree.collection__internal__[index]
 
     @property
+    @profiled
     def last_descendant(self) -> Optional['ShapeTreeNode']:
-        node = self.subtree[-1]
-        if node != self:
-            return node
+        index = tree_index(self.id_data.shape_tree)
+        position = index.position(self.name)
+        if index.extent(position) > 0:
+            return self.id_data.shape_tree.collection__internal__[index.subtree_end[position] - 1]
 
     name: StringProperty(
         name="Name",
@@ -185,40 +242,28 @@ class ShapeTreeNode(ASKSComponent, PropertyGroup):
         )
 
     @property
+    @profiled
     def next_sibling(self) -> Optional['ShapeTreeNode']:
-        nodes = self.id_data.shape_tree.collection__internal__
-        depth = self.depth
-        index = nodes.find(self.name)+1
-        count = len(nodes)
-        while index < count:
-            node = nodes[index]
-            node_depth = node.depth
-            if node_depth < depth: break
-            if node_depth == depth: return node
-            index += 1
+        index = tree_index(self.id_data.shape_tree)
+        index = index.next_sibling[index.position(self.name)]
+        if index != -1:
+            return self.id_data.shape_tree.collection__internal__[index]
 
     @property
+    @profiled
     def parent(self) -> Optional['ShapeTreeNode']:
-        depth = self.depth - 1
-        if depth >= 0:
-            nodes = self.id_data.shape_tree.collection__internal__
-            index = nodes.find(self.name) - 1
-            while index >= 0:
-                node = nodes[index]
-                if node.depth == depth: return node
-                index -= 1
+        index = tree_index(self.id_data.shape_tree)
+        index = index.parent[index.position(self.name)]
+        if index != -1:
+            return self.id_data.shape_tree.collection__internal__[index]
 
     @property
+    @profiled
     def previous_sibling(self) -> Optional['ShapeTreeNode']:
-        nodes = self.id_data.shape_tree.collection__internal__
-        depth = self.depth
-        index = nodes.find(self.name)-1
-        while index >= 0:
-            node = nodes[index]
-            node_depth = node.depth
-            if node_depth < depth: break
-            if node_depth == depth: return node
-            index -= 1
+        index = tree_index(self.id_data.shape_tree)
+        index = index.previous_sibling[index.position(self.name)]
+        if index != -1:
+            return self.id_data.shape_tree.collection__internal__[index]
 
     @property
     def shape(self) -> Optional['ShapeKey']:
@@ -229,22 +274,23 @@ class ShapeTreeNode(ASKSComponent, PropertyGroup):
         name="Expand",
         description="Expand the node to show subnodes in the UI",
         default=True,
+        update=node_show_expanded_update,
         options=set()
         )
 
     @property
-    def subtree(self) -> List['ShapeTreeNode']:
-        stree = [self]
+    @profiled
+    def siblings(self) -> List['ShapeTreeNode']:
         nodes = self.id_data.shape_tree.collection__internal__
-        depth = self.depth + 1
-        count = len(nodes)
-        index = self.index + 1
-        while index < count:
-            node = nodes[index]
-            if node.depth < depth: break
-            stree.append(node)
-            index += 1
-        return stree
+        index = tree_index(self.id_data.shape_tree)
+        return [nodes[i] for i in index.siblings(index.position(self.name))]
+
+    @property
+    @profiled
+    def subtree(self) -> List['ShapeTreeNode']:
+        index = tree_index(self.id_data.shape_tree)
+        position = index.position(self.name)
+        return self.id_data.shape_tree.collection__internal__[position:index.subtree_end[position]]
 
     type: EnumProperty(
         name="Type",
@@ -275,6 +321,10 @@ class ShapeTreeNode(ASKSComponent, PropertyGroup):
     def __len__(self) -> int:
         return self.get("length", 0)
 
+    def is_ancestor_of(self, node) -> bool:
+        index = tree_index(self.id_data.shape_tree)
+        return index.is_ancestor_of(index.position(self.name), index.position(node.name))
+
     def is_child_of(self, node) -> bool:
         return node.is_parent_of(self)
 
@@ -282,7 +332,9 @@ class ShapeTreeNode(ASKSComponent, PropertyGroup):
         return node.is_ancestor_of(self)
 
     def is_parent_of(self, node) -> bool:
-        return node.parent == self
+        index = tree_index(self.id_data.shape_tree)
+        return index.parent[index.position(node.name)] == index.position(self.name)
 
     def is_sibling_of(self, node) -> bool:
-        return self.parent == node.parent
+        index = tree_index(self.id_data.shape_tree)
+        return index.parent[index.position(self.name)] == index.parent[index.position(node.name)]
@@ -1,9 +1,35 @@
-
-from typing import Optional
+from typing import Any, Collection, ContextManager, Dict, List, Mapping, Optional, Sequence, TYPE_CHECKING, Union
 from bpy.types import PropertyGroup
-from bpy.props import CollectionProperty, IntProperty
+from bpy.props import CollectionProperty, EnumProperty, IntProperty
 from ..lib.asks import ASKSNamespace
 from .node import NODE_TYPE_CHILD, NODE_TYPE_VALID, ShapeTreeNode, NODE_TYPE_TABLE
+if TYPE_CHECKING:
+    from bpy.types import Context, Object
+    from numpy import ndarray
+
+DRIVER_MODE_ITEMS = [
+    ('CHAINED', "Chained", "Node weights multiply their influence by the weight of their parent"),
+    ('FLAT', "Flat", "Node weights multiply their influence by the influences of all their ancestors"),
+    ]
+
+EVALUATION_MODE_ITEMS = [
+    ('DRIVERS', "Drivers", "Evaluate node weights and shape key values with a driver per node"),
+    ('VECTORIZED', "Vectorized", "Evaluate all node weights and shape key values in a single pass"),
+    ('SPARSE', "Sparse", "Evaluate in a single pass, skipping everything below a node whose weight is zero"),
+    ]
+
+
+def tree_driver_mode_update(tree: 'ShapeTree', _: 'Context') -> None:
+    from ..app.drivers import tree_weight_drivers_update
+    tree_weight_drivers_update(tree)
+
+
+def tree_evaluation_mode_update(tree: 'ShapeTree', _: 'Context') -> None:
+    from ..app.evaluate import tree_drivers_mute, tree_evaluate
+    vectorized = tree.evaluation_mode != 'DRIVERS'
+    tree_drivers_mute(tree, vectorized)
+    if vectorized:
+        tree_evaluate(tree, force=True)
 
 
 class ShapeTree(ASKSNamespace[ShapeTreeNode], PropertyGroup):
@@ -24,3 +50,64 @@ class ShapeTree(ASKSNamespace[ShapeTreeNode], PropertyGroup):
         type=ShapeTreeNode,
         options={'HIDDEN'}
         )
+
+    driver_mode: EnumProperty(
+        name="Drivers",
+        description="How node weight drivers depend on the rest of the tree",
+        items=DRIVER_MODE_ITEMS,
+        default='CHAINED',
+        update=tree_driver_mode_update,
+        options=set()
+        )
+
+    evaluation_mode: EnumProperty(
+        name="Evaluation",
+        description="How node weights and shape key values are evaluated",
+        items=EVALUATION_MODE_ITEMS,
+        default='DRIVERS',
+        update=tree_evaluation_mode_update,
+        options=set()
+        )
+
+    generation: IntProperty(
+        name="Generation",
+        description="Changes whenever the structure of the tree changes (read-only)",
+        default=0,
+        options={'HIDDEN'}
+        )
+
+    def add_nodes(self,
+                  spec: Any,
+                  parent: Optional[ShapeTreeNode]=None,
+                  object: Optional['Object']=None) -> List[ShapeTreeNode]:
+        from ..app.structure import tree_add_nodes
+        return tree_add_nodes(self, spec, parent, object)
+
+    def event_batch(self, deferred: bool=False) -> ContextManager[None]:
+        from ..app.events import event_batch
+        return event_batch(deferred)
+
+    def get_influences(self) -> 'ndarray':
+        from ..app.evaluate import tree_influences_get
+        return tree_influences_get(self)
+
+    def rename_nodes(self,
+                     pattern: str,
+                     replacement: str,
+                     mode: str='WILDCARD',
+                     root: Optional[ShapeTreeNode]=None,
+                     types: Optional[Collection[str]]=None) -> Dict[str, str]:
+        from ..app.rename import tree_nodes_rename
+        return tree_nodes_rename(self, pattern, replacement, mode, root, types)
+
+    def set_influences(self, values: Union[Mapping[str, float], Sequence[float]]) -> int:
+        from ..app.evaluate import tree_influences_set
+        return tree_influences_set(self, values)
+
+    def get_weights(self) -> 'ndarray':
+        from ..app.evaluate import tree_weights_get
+        return tree_weights_get(self)
+
+    def set_weights(self, values: Union[Mapping[str, float], Sequence[float]]) -> int:
+        from ..app.evaluate import tree_weights_set
+        return tree_weights_set(self, values)
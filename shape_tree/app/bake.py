@@ -0,0 +1,147 @@
+from typing import Dict, NamedTuple, TYPE_CHECKING
+import numpy as np
+from .evaluate import tree_evaluator
+if TYPE_CHECKING:
+    from bpy.types import FCurve
+    from ..api.tree import ShapeTree
+
+# Keyframe interpolation enum values as read and written by foreach_get/set
+INTERPOLATION_CONSTANT = 0
+INTERPOLATION_LINEAR = 1
+
+
+class ShapeTreeBakeResult(NamedTuple):
+    shapes: int
+    keyframes: int
+    driven: int
+
+
+def fcurve_sample(fcurve: 'FCurve', frames: np.ndarray) -> np.ndarray:
+    # Constant and linear curves are sampled with NumPy, anything else (bezier
+    # keys, modifiers or extrapolation) falls back to evaluating each frame.
+    points = fcurve.keyframe_points
+    count = len(points)
+
+    if count and not len(fcurve.modifiers) and fcurve.extrapolation == 'CONSTANT':
+        interpolation = np.empty(count, dtype=np.int32)
+        points.foreach_get("interpolation", interpolation)
+        if np.isin(interpolation[:-1], (INTERPOLATION_CONSTANT, INTERPOLATION_LINEAR)).all():
+            co = np.empty(count * 2, dtype=np.float32)
+            points.foreach_get("co", co)
+            co = co.astype(np.float64)
+            x = co[0::2]
+            y = co[1::2]
+            index = np.clip(np.searchsorted(x, frames, side='right') - 1, 0, count - 1)
+            return np.where(interpolation[index] == INTERPOLATION_CONSTANT, y[index], np.interp(frames, x, y))
+
+    evaluate = fcurve.evaluate
+    return np.fromiter((evaluate(frame) for frame in frames.tolist()), dtype=np.float64, count=len(frames))
+
+
+def bake_reduce(frames: np.ndarray, values: np.ndarray, tolerance: float) -> np.ndarray:
+    # Keeps the keys where the curve bends, then repeatedly adds back the worst
+    # key between each pair of kept keys until linear interpolation of the
+    # kept keys is within the tolerance everywhere.
+    keep = np.ones(len(values), dtype=bool)
+    if len(values) > 2:
+        keep[1:-1] = np.abs(values[:-2] - 2.0 * values[1:-1] + values[2:]) > tolerance
+        while True:
+            error = np.abs(np.interp(frames, frames[keep], values[keep]) - values)
+            error[keep] = 0.0
+            if error.max() <= tolerance:
+                break
+            segment = np.cumsum(keep)
+            order = np.lexsort((error, segment))
+            worst = order[np.append(segment[order][1:] != segment[order][:-1], True)]
+            keep[worst[error[worst] > tolerance]] = True
+    return keep
+
+
+def tree_bake(tree: 'ShapeTree',
+              frame_start: int,
+              frame_end: int,
+              step: int=1,
+              reduce: bool=False,
+              tolerance: float=1e-4,
+              mute_drivers: bool=True) -> ShapeTreeBakeResult:
+    from bpy import data
+
+    key = tree.id_data
+    evaluator = tree_evaluator(tree)
+    names = evaluator.influence_names
+    frames = np.arange(frame_start, frame_end + 1, max(step, 1), dtype=np.float64)
+
+    # (frames, nodes) influences, starting from the current static values
+    weight = np.empty((len(frames), len(names)), dtype=np.float64)
+    weight[:] = evaluator.read(key, names)
+
+    animdata = key.animation_data
+    driven = 0
+
+    if animdata is not None:
+        drivers = {fcurve.data_path for fcurve in animdata.drivers}
+        fcurves: Dict[str, 'FCurve'] = {}
+        if animdata.action is not None:
+            fcurves = {fcurve.data_path: fcurve for fcurve in animdata.action.fcurves if not fcurve.mute}
+        for index, name in enumerate(names):
+            if name:
+                path = f'["{name}"]'
+                if path in drivers:
+                    # Can't be sampled without stepping the scene, baked as is
+                    driven += 1
+                fcurve = fcurves.get(path)
+                if fcurve is not None:
+                    weight[:, index] = fcurve_sample(fcurve, frames)
+
+    parent = evaluator.parent
+    for level in evaluator.levels:
+        weight[:, level] *= weight[:, parent[level]]
+
+    shape_nodes = evaluator.shape_nodes
+    values = weight[:, shape_nodes].astype(np.float32)
+    # tree_evaluator rebuilds when shape keys change outside of the tree, so
+    # the names its block positions were built against are still current
+    block_names = evaluator.blocks
+
+    if animdata is None:
+        animdata = key.animation_data_create()
+    if animdata.action is None:
+        animdata.action = data.actions.new(f'{key.name}Action')
+
+    fcurves = animdata.action.fcurves
+    drivers = {fcurve.data_path: fcurve for fcurve in animdata.drivers}
+    keyframes = 0
+
+    for column, block in enumerate(evaluator.shape_blocks.tolist()):
+        path = f'key_blocks["{block_names[block]}"].value'
+
+        fcurve = fcurves.find(path)
+        if fcurve is not None:
+            fcurves.remove(fcurve)
+        fcurve = fcurves.new(path)
+
+        x = frames.astype(np.float32)
+        y = values[:, column]
+        if reduce:
+            keep = bake_reduce(frames, y, tolerance)
+            x = x[keep]
+            y = y[keep]
+
+        co = np.empty(len(x) * 2, dtype=np.float32)
+        co[0::2] = x
+        co[1::2] = y
+
+        points = fcurve.keyframe_points
+        points.add(len(x))
+        points.foreach_set("co", co)
+        points.foreach_set("interpolation", np.full(len(x), INTERPOLATION_LINEAR, dtype=np.int32))
+        fcurve.update()
+        keyframes += len(x)
+
+        if mute_drivers:
+            # Drivers override the action, the value driver has to be muted
+            driver = drivers.get(path)
+            if driver is not None:
+                driver.mute = True
+
+    return ShapeTreeBakeResult(len(shape_nodes), keyframes, driven)
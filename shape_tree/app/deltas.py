@@ -0,0 +1,199 @@
+from typing import Collection, Dict, NamedTuple, Optional, Set, Tuple, TYPE_CHECKING
+import numpy as np
+if TYPE_CHECKING:
+    from bpy.types import Key, Object, ShapeKey
+    from ..api.node import ShapeTreeNode
+
+DELTA_EPSILON = 1e-6
+
+# Number of moved vertices whose coordinates identify a cached delta
+DELTA_SAMPLES = 8
+
+# Modes in which shape coordinates or vertex group weights can change. Edit
+# mode writes back to the key when it is left, the others write directly.
+DELTA_EDIT_MODES = {'EDIT', 'SCULPT', 'WEIGHT_PAINT'}
+
+_cache: Dict[int, Dict[str, Tuple[tuple, 'ShapeTreeDelta']]] = {}
+_basis: Dict[int, Dict[str, np.ndarray]] = {}
+_groups: Dict[int, 'ShapeTreeVertexGroups'] = {}
+_editing: Dict[int, Set[str]] = {}
+
+
+class ShapeTreeDelta(NamedTuple):
+    # Offsets from the relative key of the vertices that move by more than
+    # DELTA_EPSILON on any axis. Weights are the vertex group weights of those
+    # vertices, or None if the shape has no vertex group.
+    indices: np.ndarray
+    offsets: np.ndarray
+    weights: Optional[np.ndarray]
+    count: int
+
+    def dense(self) -> np.ndarray:
+        result = np.zeros((self.count, 3), dtype=np.float32)
+        result[self.indices] = self.offsets
+        return result
+
+
+def shape_coordinates(shape: 'ShapeKey') -> np.ndarray:
+    result = np.empty(len(shape.data) * 3, dtype=np.float32)
+    shape.data.foreach_get("co", result)
+    return result.reshape(-1, 3)
+
+
+class ShapeTreeVertexGroups:
+    # Every vertex group assignment of the object that uses a key's data,
+    # read in one pass over the vertices. Dense weights are built per group
+    # the first time a shape asks for them.
+
+    __slots__ = ("count", "names", "groups", "vertices", "weights", "dense")
+
+    def __init__(self, object: Optional['Object']) -> None:
+        self.names: Dict[str, int] = {}
+        self.dense: Dict[int, np.ndarray] = {}
+        groups = []
+        vertices = []
+        weights = []
+
+        elements = ()
+        if object is not None and len(object.vertex_groups):
+            data = object.data
+            elements = data.vertices if hasattr(data, "vertices") else getattr(data, "points", ())
+            self.names = {group.name: group.index for group in object.vertex_groups}
+            for index, element in enumerate(elements):
+                for item in element.groups:
+                    groups.append(item.group)
+                    vertices.append(index)
+                    weights.append(item.weight)
+
+        self.count = len(elements)
+        self.groups = np.array(groups, dtype=np.int32)
+        self.vertices = np.array(vertices, dtype=np.int32)
+        self.weights = np.array(weights, dtype=np.float32)
+
+    def get(self, name: str) -> Optional[np.ndarray]:
+        group = self.names.get(name)
+        if group is None:
+            return None
+        result = self.dense.get(group)
+        if result is None:
+            mask = self.groups == group
+            result = self.dense[group] = np.zeros(self.count, dtype=np.float32)
+            result[self.vertices[mask]] = self.weights[mask]
+        return result
+
+
+def vertex_groups(key: 'Key') -> ShapeTreeVertexGroups:
+    # Vertex groups belong to objects, use the first one that shares the data
+    pointer = key.as_pointer()
+    result = _groups.get(pointer)
+    if result is None:
+        from bpy import data
+        user = key.user
+        object = next((object for object in data.objects if object.data == user), None)
+        result = _groups[pointer] = ShapeTreeVertexGroups(object)
+    return result
+
+
+def vertex_group_weights(key: 'Key', name: str, indices: np.ndarray) -> Optional[np.ndarray]:
+    weights = vertex_groups(key).get(name)
+    return weights[indices] if weights is not None and len(weights) else None
+
+
+def relative_coordinates(key: 'Key', shape: 'ShapeKey') -> np.ndarray:
+    # Relative key coordinates are shared by every shape that uses them
+    relative = shape.relative_key
+    basis = _basis.setdefault(key.as_pointer(), {})
+    coordinates = basis.get(relative.name)
+    if coordinates is None:
+        coordinates = basis[relative.name] = shape_coordinates(relative)
+    return coordinates
+
+
+def shape_delta(key: 'Key', shape: 'ShapeKey') -> ShapeTreeDelta:
+    offsets = shape_coordinates(shape) - relative_coordinates(key, shape)
+    indices = np.flatnonzero((np.abs(offsets) > DELTA_EPSILON).any(axis=1)).astype(np.int32)
+    weights = vertex_group_weights(key, shape.vertex_group, indices) if shape.vertex_group else None
+    return ShapeTreeDelta(indices, offsets[indices], weights, len(offsets))
+
+
+def delta_signature(shape: 'ShapeKey', indices: np.ndarray) -> tuple:
+    # Deltas are cached by shape name, so the signature also holds the
+    # coordinates of a few of the vertices the delta moves. A name that now
+    # belongs to another shape, after a swap or a rename outside of the tree,
+    # then no longer matches the cached delta.
+    data = shape.data
+    if len(indices):
+        samples = indices[::max(len(indices) // DELTA_SAMPLES, 1)][:DELTA_SAMPLES].tolist()
+    else:
+        samples = [0] if len(data) else []
+    return (shape.relative_key.name,
+            shape.vertex_group,
+            len(data),
+            len(indices),
+            tuple(tuple(data[index].co) for index in samples))
+
+
+def key_delta(key: 'Key', name: str) -> Optional[ShapeTreeDelta]:
+    shape = key.key_blocks.get(name)
+    if shape is None:
+        return None
+
+    cache = _cache.setdefault(key.as_pointer(), {})
+    cached = cache.get(name)
+    if cached is not None and cached[0] == delta_signature(shape, cached[1].indices):
+        return cached[1]
+
+    result = shape_delta(key, shape)
+    cache[name] = (delta_signature(shape, result.indices), result)
+    return result
+
+
+def node_delta(node: 'ShapeTreeNode') -> Optional[ShapeTreeDelta]:
+    if node.is_shape:
+        return key_delta(node.id_data, node.name)
+
+
+def key_shapes_invalidate(key: 'Key', names: Collection[str]) -> None:
+    # Drops the deltas of shapes whose coordinates changed, the relative
+    # coordinates they provide to other shapes and the deltas of the shapes
+    # that are relative to them
+    pointer = key.as_pointer()
+    names = set(names)
+    cache = _cache.get(pointer)
+    if cache:
+        for name in [name for name, (signature, _) in cache.items() if name in names or signature[0] in names]:
+            del cache[name]
+    basis = _basis.get(pointer)
+    if basis:
+        for name in names:
+            basis.pop(name, None)
+
+
+def object_deltas_update(object: 'Object') -> None:
+    # Called on geometry updates of objects with shape keys. Shapes edited in
+    # a mode are remembered until the mode is left, so that value changes
+    # and evaluation never invalidate anything.
+    key = object.data.shape_keys
+    pointer = key.as_pointer()
+    mode = object.mode
+
+    if mode in DELTA_EDIT_MODES:
+        shape = object.active_shape_key
+        if shape is not None:
+            _editing.setdefault(pointer, set()).add(shape.name)
+            if mode == 'SCULPT':
+                key_shapes_invalidate(key, (shape.name,))
+        if mode == 'WEIGHT_PAINT':
+            _groups.pop(pointer, None)
+
+    elif pointer in _editing:
+        key_shapes_invalidate(key, _editing.pop(pointer))
+        # Weights can also be assigned in edit mode
+        _groups.pop(pointer, None)
+
+
+def deltas_clear() -> None:
+    _cache.clear()
+    _basis.clear()
+    _groups.clear()
+    _editing.clear()
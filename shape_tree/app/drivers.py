@@ -1,9 +1,16 @@
 
-from typing import TYPE_CHECKING, Optional
-from ..lib.driver_utils import driver_ensure, driver_variables_clear
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Sequence, Tuple
+from ..lib.asks import idprop_create
+from ..lib.driver_utils import driver_ensure
+from .navigation import tree_index
+from .profiling import profiled
 if TYPE_CHECKING:
-    from bpy.types import FCurve
+    from bpy.types import Driver, FCurve, Key
     from ..api.node import ShapeTreeNode
+    from ..api.tree import ShapeTree
+
+_batches: Dict[int, 'ShapeTreeDriverBatch'] = {}
 
 
 def is_asks_driver(fcurve: 'FCurve') -> bool:
@@ -18,57 +25,232 @@ def is_asks_driver(fcurve: 'FCurve') -> bool:
     return False
 
 
-def node_weight_driver_create(node: 'ShapeTreeNode',
-                              parent: Optional['ShapeTreeNode']=None) -> None:
+def is_native_driver(driver: 'Driver') -> bool:
+    return driver.type != 'SCRIPTED' or (driver.is_simple_expression and not driver.use_self)
 
-    fcurve = driver_ensure(node.id_data, node.weight_property_path)
-    driver = fcurve.driver
 
-    variables = driver.variables
-    driver_variables_clear(variables)
+class ShapeTreeDriverBatch:
+    # Data path to driver F-Curve index for one Key, kept for the length of a
+    # batch so that lookups don't scan the whole driver list every time.
 
-    variable = variables.new()
-    variable.type = 'SINGLE_PROP'
-    variable.name = "i"
+    __slots__ = ("fcurves",)
 
-    target = variable.targets[0]
-    target.id_type = 'KEY'
-    target.id = node.id_data
-    target.data_path = node.influence_property_path
+    def __init__(self, key: 'Key') -> None:
+        animdata = key.animation_data
+        self.fcurves: Dict[str, 'FCurve'] = {fcurve.data_path: fcurve for fcurve in animdata.drivers} if animdata else {}
 
-    expression = variable.name
 
-    if parent is not None:
-        variable = variables.new()
-        variable.type = 'SINGLE_PROP'
-        variable.name = "w"
+@contextmanager
+def driver_batch(key: 'Key') -> Iterator[ShapeTreeDriverBatch]:
+    # Groups driver edits on a Key, with a single update tag once the
+    # outermost batch ends. Blender has no way to defer the relations update
+    # each new driver tags, so a batch saves the driver lookups and redundant
+    # writes rather than relation rebuilds. Building the index scans every
+    # driver, so only open a batch for edits to more than a node or two.
+    # Drivers must not be removed from the Key inside a batch.
+    pointer = key.as_pointer()
+    batch = _batches.get(pointer)
+    if batch is not None:
+        yield batch
+        return
+
+    batch = _batches[pointer] = ShapeTreeDriverBatch(key)
+    try:
+        yield batch
+    finally:
+        del _batches[pointer]
+        key.update_tag()
 
-        target = variable.targets[0]
-        target.id_type = 'KEY'
-        target.id = parent.id_data
-        target.data_path = parent.weight_property_path
 
-        expression = f'{variable.name}*{expression}'
+def driver_find(key: 'Key', data_path: str) -> Optional['FCurve']:
+    # Outside a batch the lookup is left to Blender rather than indexing
+    # every driver of the Key for a single edit
+    batch = _batches.get(key.as_pointer())
+    if batch is not None:
+        return batch.fcurves.get(data_path)
+    animdata = key.animation_data
+    return animdata.drivers.find(data_path) if animdata is not None else None
 
-    driver.type = 'SCRIPTED'
-    driver.expression = expression
 
+def driver_get_or_create(key: 'Key', data_path: str) -> 'FCurve':
+    batch = _batches.get(key.as_pointer())
+    if batch is None:
+        return driver_ensure(key, data_path)
+    fcurve = batch.fcurves.get(data_path)
+    if fcurve is None:
+        fcurve = batch.fcurves[data_path] = key.driver_add(data_path)
+    return fcurve
 
-def node_value_driver_create(node: 'ShapeTreeNode') -> None:
-    fcurve = driver_ensure(node.id_data, f'key_blocks["{node.name}"].value')
+
+def driver_assign(fcurve: 'FCurve',
+                  variables: Sequence[Tuple[str, str]],
+                  type: str,
+                  expression: str="") -> None:
+    # Points the driver at (name, data path) properties of its Key. Existing
+    # variables are reused and only values that differ are written, so that
+    # rebuilding an up to date driver doesn't touch it at all.
+    key = fcurve.id_data
     driver = fcurve.driver
+    collection = driver.variables
+    existing = list(collection)
+
+    for variable in reversed(existing[len(variables):]):
+        collection.remove(variable)
+
+    for index, (name, data_path) in enumerate(variables):
+        variable = existing[index] if index < len(existing) else collection.new()
+        if variable.type != 'SINGLE_PROP':
+            variable.type = 'SINGLE_PROP'
+        if variable.name != name:
+            variable.name = name
+
+        target = variable.targets[0]
+        if target.id_type != 'KEY':
+            target.id_type = 'KEY'
+        if target.id != key:
+            target.id = key
+        if target.data_path != data_path:
+            target.data_path = data_path
+
+    if driver.type != type:
+        driver.type = type
+
+    if type == 'SCRIPTED':
+        if driver.use_self:
+            driver.use_self = False
+        if driver.expression != expression:
+            driver.expression = expression
+
+
+@profiled
+def node_weight_driver_create(node: 'ShapeTreeNode',
+                              parent: Optional['ShapeTreeNode']=None) -> 'FCurve':
+    fcurve = driver_get_or_create(node.id_data, node.weight_property_path)
+
+    if parent is None:
+        driver_assign(fcurve, [("i", node.influence_property_path)], 'AVERAGE')
+    else:
+        # There is no native product driver type, but a plain product is a
+        # simple expression which Blender evaluates without Python.
+        driver_assign(fcurve,
+                      [("i", node.influence_property_path), ("w", parent.weight_property_path)],
+                      'SCRIPTED',
+                      "w*i")
+    return fcurve
+
+
+@profiled
+def node_weight_driver_create_flat(node: 'ShapeTreeNode',
+                                   ancestors: Sequence['ShapeTreeNode']) -> 'FCurve':
+    # Reads the influence of every ancestor directly so that the weight does
+    # not wait on the parent's weight driver to be evaluated first.
+    fcurve = driver_get_or_create(node.id_data, node.weight_property_path)
+
+    variables = [("i", node.influence_property_path)]
+    variables.extend((f'a{index}', ancestor.influence_property_path) for index, ancestor in enumerate(ancestors))
+
+    if len(variables) == 1:
+        driver_assign(fcurve, variables, 'AVERAGE')
+    else:
+        driver_assign(fcurve, variables, 'SCRIPTED', "*".join(name for name, _ in variables))
+    return fcurve
+
+
+@profiled
+def node_weight_driver_update(node: 'ShapeTreeNode') -> 'FCurve':
+    tree = node.id_data.shape_tree
+    nodes = tree.collection__internal__
+    cache = tree_index(tree)
+    index = cache.position(node.name)
+
+    if tree.driver_mode == 'FLAT':
+        fcurve = node_weight_driver_create_flat(node, [nodes[i] for i in cache.ancestors(index)])
+    else:
+        parent = cache.parent[index]
+        fcurve = node_weight_driver_create(node, nodes[parent] if parent != -1 else None)
+
+    # The vectorized evaluator writes weights and values itself
+    mute = tree.evaluation_mode != 'DRIVERS'
+    if fcurve.mute != mute:
+        fcurve.mute = mute
+    return fcurve
+
+
+@profiled
+def node_value_driver_create(node: 'ShapeTreeNode') -> 'FCurve':
+    fcurve = driver_get_or_create(node.id_data, f'key_blocks["{node.name}"].value')
+    driver_assign(fcurve, [("w", node.weight_property_path)], 'AVERAGE')
+    return fcurve
+
+
+@profiled
+def node_drivers_create(node: 'ShapeTreeNode') -> None:
+    key = node.id_data
+
+    idprop_create(key, node.influence_property_name)
+    idprop_create(key, node.weight_property_name)
+
+    node_weight_driver_update(node)
+
+    if node.type == 'SHAPEKEY':
+        data_path = f'key_blocks["{node.name}"].value'
+        fcurve = driver_find(key, data_path)
+        if fcurve is None:
+            node_value_driver_create(node).mute = key.shape_tree.evaluation_mode != 'DRIVERS'
+        elif not is_asks_driver(fcurve):
+            fcurve.data_path = node.influence_property_path
+            batch = _batches.get(key.as_pointer())
+            if batch is not None:
+                del batch.fcurves[data_path]
+                batch.fcurves[fcurve.data_path] = fcurve
+
+    if key.as_pointer() not in _batches:
+        key.update_tag()
+
+
+@profiled
+def tree_drivers_convert(tree: 'ShapeTree') -> Tuple[int, int]:
+    key = tree.id_data
+    animdata = key.animation_data
+    if animdata is None:
+        return 0, 0
+
+    fcurves = {fcurve.data_path: fcurve for fcurve in animdata.drivers}
+    audited = 0
+    converted = 0
+
+    with driver_batch(key):
+        for node in tree.collection__internal__:
+            type = node.type
+            if type not in {'GROUP', 'SHAPEKEY'}:
+                continue
+
+            fcurve = fcurves.get(node.weight_property_path)
+            if fcurve is not None:
+                audited += 1
+                driver = fcurve.driver
+                if not is_native_driver(driver) or (driver.type == 'SCRIPTED' and len(driver.variables) == 1):
+                    node_weight_driver_update(node)
+                    converted += 1
 
-    variables = driver.variables
-    driver_variables_clear(variables)
+            if type == 'SHAPEKEY':
+                fcurve = fcurves.get(f'key_blocks["{node.name}"].value')
+                if fcurve is not None and not is_asks_driver(fcurve):
+                    variables = fcurve.driver.variables
+                    if (len(variables) == 1
+                            and variables[0].targets[0].data_path == node.weight_property_path):
+                        audited += 1
+                        if fcurve.driver.type != 'AVERAGE':
+                            mute = fcurve.mute
+                            node_value_driver_create(node).mute = mute
+                            converted += 1
 
-    variable = variables.new()
-    variable.type = 'SINGLE_PROP'
-    variable.name = "w"
+    return audited, converted
 
-    target = variable.targets[0]
-    target.id_type = 'KEY'
-    target.id = node.id_data
-    target.data_path = node.weight_property_path
 
-    driver.type = 'SCRIPTED'
-    driver.expression = variable.name
+@profiled
+def tree_weight_drivers_update(tree: 'ShapeTree') -> None:
+    with driver_batch(tree.id_data):
+        for node in tree.collection__internal__:
+            if node.type in {'GROUP', 'SHAPEKEY'}:
+                node_weight_driver_update(node)
@@ -0,0 +1,265 @@
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, TYPE_CHECKING, Union
+import numpy as np
+from ..api.node import NODE_TYPE_TABLE
+from .navigation import tree_index
+if TYPE_CHECKING:
+    from bpy.types import Key
+    from ..api.tree import ShapeTree
+
+_cache: Dict[int, 'ShapeTreeEvaluator'] = {}
+
+
+class ShapeTreeEvaluator:
+    # Flattened view of a tree for evaluating every node weight in one pass.
+    # Nodes are stored in collection order, so a parent always precedes its
+    # children and the weights can be propagated one depth level at a time.
+
+    __slots__ = ("generation",
+                 "blocks",
+                 "parent",
+                 "roots",
+                 "levels",
+                 "influence_names",
+                 "weight_names",
+                 "shape_nodes",
+                 "shape_blocks",
+                 "influence",
+                 "weight")
+
+    def __init__(self, tree: 'ShapeTree') -> None:
+        key = tree.id_data
+        nodes = tree.collection__internal__
+        cache = tree_index(tree)
+        count = len(nodes)
+
+        self.generation = cache.generation
+        self.parent = np.array(cache.parent, dtype=np.int32)
+
+        depth = np.array(cache.depth, dtype=np.int32)
+        self.roots = np.flatnonzero(depth == 0)
+        self.levels = [np.flatnonzero(depth == level) for level in range(1, int(depth.max(initial=0)) + 1)]
+
+        self.influence_names: List[Optional[str]] = []
+        self.weight_names: List[Optional[str]] = []
+
+        # Shape keys can be added, removed or reordered outside of the tree,
+        # which leaves the block positions below pointing at other shapes
+        self.blocks = tuple(key.key_blocks.keys())
+        blocks = {name: index for index, name in enumerate(self.blocks)}
+        shape_nodes = []
+        shape_blocks = []
+        shape_type = NODE_TYPE_TABLE['SHAPEKEY']
+        group_type = NODE_TYPE_TABLE['GROUP']
+
+        # Weights of other node types are driven by the add-ons that own them
+        for index, node in enumerate(nodes):
+            type = node.get("type", 0)
+            self.influence_names.append(node.influence_property_name)
+            self.weight_names.append(node.weight_property_name if type in (group_type, shape_type) else None)
+            if type == shape_type:
+                block = blocks.get(node.name)
+                if block is not None:
+                    shape_nodes.append(index)
+                    shape_blocks.append(block)
+
+        self.shape_nodes = np.array(shape_nodes, dtype=np.int32)
+        self.shape_blocks = np.array(shape_blocks, dtype=np.int32)
+        # Unknown until the first run, which then writes every weight
+        self.influence = np.full(count, np.nan, dtype=np.float32)
+        self.weight = np.full(count, np.nan, dtype=np.float32)
+
+    def __call__(self, key: 'Key', force: bool=False, sparse: bool=False) -> bool:
+        if sparse:
+            influence = self.read_sparse(key)
+        else:
+            influence = self.read(key, self.influence_names)
+
+        if not force and np.array_equal(influence, self.influence, equal_nan=True):
+            return False
+
+        weight = np.nan_to_num(influence, nan=0.0)
+        parent = self.parent
+        for level in self.levels:
+            weight[level] *= weight[parent[level]]
+
+        changed = np.arange(len(weight)) if force else np.flatnonzero(weight != self.weight)
+        for index in changed.tolist():
+            name = self.weight_names[index]
+            if name:
+                key[name] = float(weight[index])
+
+        if len(self.shape_nodes):
+            key_blocks = key.key_blocks
+            values = np.empty(len(key_blocks), dtype=np.float32)
+            key_blocks.foreach_get("value", values)
+            values[self.shape_blocks] = weight[self.shape_nodes]
+            key_blocks.foreach_set("value", values)
+
+        key.update_tag()
+        self.influence = influence
+        self.weight = weight
+        return True
+
+    def read(self, key: 'Key', names: Sequence[Optional[str]], default: float=0.0) -> np.ndarray:
+        get = key.get
+        return np.fromiter((get(name, 0.0) if name else default for name in names),
+                           dtype=np.float32,
+                           count=len(names))
+
+    def read_sparse(self, key: 'Key') -> np.ndarray:
+        # Reads influences a level at a time, skipping every node below a zero
+        # weight. Skipped influences are NaN, so changes to them are ignored
+        # until their ancestors become active again.
+        get = key.get
+        names = self.influence_names
+        parent = self.parent
+        influence = np.full(len(names), np.nan, dtype=np.float32)
+        weight = np.zeros(len(names), dtype=np.float32)
+
+        def values(level: np.ndarray) -> np.ndarray:
+            return np.fromiter((get(names[index], 0.0) if names[index] else 0.0 for index in level.tolist()),
+                               dtype=np.float32,
+                               count=len(level))
+
+        level = self.roots
+        influence[level] = weight[level] = values(level)
+
+        for level in self.levels:
+            level = level[weight[parent[level]] != 0.0]
+            influence[level] = values(level)
+            weight[level] = influence[level] * weight[parent[level]]
+
+        return influence
+
+    def write(self,
+              key: 'Key',
+              names: Sequence[Optional[str]],
+              indices: np.ndarray,
+              values: np.ndarray) -> np.ndarray:
+        # Writes the values that differ from the current ones and returns the
+        # positions that changed.
+        get = key.get
+        current = np.fromiter((get(names[index], 0.0) if names[index] else np.nan for index in indices.tolist()),
+                              dtype=np.float32,
+                              count=len(indices))
+        changed = (current != values) & ~np.isnan(current)
+        indices = indices[changed]
+        for index, value in zip(indices.tolist(), values[changed].tolist()):
+            key[names[index]] = value
+        return indices
+
+
+def tree_evaluator(tree: 'ShapeTree') -> ShapeTreeEvaluator:
+    pointer = tree.id_data.as_pointer()
+    cached = _cache.get(pointer)
+    if (cached is None
+            or cached.generation != tree.generation
+            or len(cached.weight) != len(tree.collection__internal__)
+            or cached.blocks != tuple(tree.id_data.key_blocks.keys())):
+        cached = ShapeTreeEvaluator(tree)
+        _cache[pointer] = cached
+    return cached
+
+
+def tree_evaluator_clear() -> None:
+    _cache.clear()
+
+
+def tree_evaluate(tree: 'ShapeTree', force: bool=False) -> bool:
+    return tree_evaluator(tree)(tree.id_data, force, tree.evaluation_mode == 'SPARSE')
+
+
+def tree_drivers_mute(tree: 'ShapeTree', mute: bool) -> None:
+    key = tree.id_data
+    animdata = key.animation_data
+    if animdata is None:
+        return
+
+    fcurves = {fcurve.data_path: fcurve for fcurve in animdata.drivers}
+    shape_type = NODE_TYPE_TABLE['SHAPEKEY']
+    group_type = NODE_TYPE_TABLE['GROUP']
+
+    for node in tree.collection__internal__:
+        type = node.get("type", 0)
+        if type == group_type:
+            paths = [node.weight_property_path]
+        elif type == shape_type:
+            paths = [node.weight_property_path, f'key_blocks["{node.name}"].value']
+        else:
+            continue
+        for path in paths:
+            fcurve = fcurves.get(path)
+            if fcurve is not None:
+                fcurve.mute = mute
+
+
+def tree_values_resolve(tree: 'ShapeTree',
+                        values: Union[Mapping[str, float], Sequence[float], np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    # Node positions and values from an array in node order or a mapping of
+    # node names to values.
+    if isinstance(values, Mapping):
+        position = tree_index(tree).position
+        indices = np.fromiter(map(position, values.keys()), dtype=np.int64, count=len(values))
+        if len(indices) and indices.min() == -1:
+            raise KeyError(f'Node "{list(values.keys())[int(np.argmin(indices))]}" not found')
+        return indices, np.fromiter(values.values(), dtype=np.float32, count=len(values))
+
+    count = len(tree.collection__internal__)
+    values = np.asarray(values, dtype=np.float32).reshape(-1)
+    if len(values) != count:
+        raise ValueError(f'Expected {count} values, got {len(values)}')
+    return np.arange(count), values
+
+
+def tree_influences_get(tree: 'ShapeTree') -> np.ndarray:
+    evaluator = tree_evaluator(tree)
+    return evaluator.read(tree.id_data, evaluator.influence_names)
+
+
+def tree_influences_set(tree: 'ShapeTree',
+                        values: Union[Mapping[str, float], Sequence[float], np.ndarray]) -> int:
+    key = tree.id_data
+    evaluator = tree_evaluator(tree)
+    indices, values = tree_values_resolve(tree, values)
+    changed = evaluator.write(key, evaluator.influence_names, indices, values)
+    if len(changed):
+        # One update for the whole batch, vectorized trees also propagate now
+        if tree.evaluation_mode != 'DRIVERS':
+            evaluator(key, sparse=tree.evaluation_mode == 'SPARSE')
+        else:
+            key.update_tag()
+    return len(changed)
+
+
+def tree_weights_get(tree: 'ShapeTree') -> np.ndarray:
+    # Nodes whose weights are owned by other add-ons read as NaN
+    evaluator = tree_evaluator(tree)
+    return evaluator.read(tree.id_data, evaluator.weight_names, np.nan)
+
+
+def tree_weights_set(tree: 'ShapeTree',
+                     values: Union[Mapping[str, float], Sequence[float], np.ndarray]) -> int:
+    # Weights are derived from influences, so values written here only last
+    # until the weight drivers or the vectorized evaluator next run.
+    key = tree.id_data
+    evaluator = tree_evaluator(tree)
+    indices, values = tree_values_resolve(tree, values)
+    changed = evaluator.write(key, evaluator.weight_names, indices, values)
+    if not len(changed):
+        return 0
+
+    weight = np.full(len(evaluator.weight_names), np.nan, dtype=np.float32)
+    weight[indices] = values
+    evaluator.weight[changed] = weight[changed]
+
+    shapes = weight[evaluator.shape_nodes]
+    mask = ~np.isnan(shapes)
+    if mask.any():
+        key_blocks = key.key_blocks
+        blocks = np.empty(len(key_blocks), dtype=np.float32)
+        key_blocks.foreach_get("value", blocks)
+        blocks[evaluator.shape_blocks[mask]] = shapes[mask]
+        key_blocks.foreach_set("value", blocks)
+
+    key.update_tag()
+    return len(changed)
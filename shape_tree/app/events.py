@@ -0,0 +1,199 @@
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Tuple, TYPE_CHECKING
+from ..lib.events import dataclass, dispatch_event, Event
+from .profiling import profiled
+if TYPE_CHECKING:
+    from bpy.types import Key
+    from ..api.node import ShapeTreeNode
+    from ..api.tree import ShapeTree
+
+_queues: Dict[int, 'ShapeTreeEventQueue'] = {}
+_depth = 0
+_replay = 0
+
+# Every event goes to every listener, instrument it along with the rest
+profiled(dispatch_event)
+
+
+@dataclass(frozen=True)
+class ShapeTreeNodeAddEvent(Event):
+    node: 'ShapeTreeNode'
+
+
+@dataclass(frozen=True)
+class ShapeTreeNodeRemoveEvent(Event):
+    tree: 'ShapeTree'
+    name: str
+
+
+@dataclass(frozen=True)
+class ShapeTreeNodeMoveEvent(Event):
+    node: 'ShapeTreeNode'
+    index: int
+    previous_index: int
+
+
+@dataclass(frozen=True)
+class ShapeTreeUpdateEvent(Event):
+    # Dispatched once per tree for every flush and carries the coalesced node
+    # events, so a batch costs one listener pass however many nodes it
+    # touched. Listeners that still expect the node events on their own can
+    # opt in with events_replay_enable.
+    tree: 'ShapeTree'
+    events: Tuple[Event, ...]
+
+
+class ShapeTreeEventQueue:
+    # Net changes to the nodes of one tree since the last dispatch. Nodes are
+    # tracked by their current name because node references don't survive
+    # changes to the collection.
+
+    __slots__ = ("key", "added", "removed", "renamed", "moved")
+
+    def __init__(self, key: 'Key') -> None:
+        self.key = key
+        # Ordered sets of current and original names
+        self.added: Dict[str, None] = {}
+        self.removed: Dict[str, None] = {}
+        # Current name to (original name, requested name)
+        self.renamed: Dict[str, Tuple[str, str]] = {}
+        # Current name to original index
+        self.moved: Dict[str, int] = {}
+
+    def add(self, name: str) -> None:
+        self.added[name] = None
+
+    def move(self, name: str, previous_index: int) -> None:
+        if name not in self.added:
+            self.moved.setdefault(name, previous_index)
+
+    def remove(self, name: str) -> None:
+        self.moved.pop(name, None)
+        if name in self.added:
+            del self.added[name]
+        else:
+            self.removed[self.renamed.pop(name, (name,))[0]] = None
+
+    def rename(self, previous_value: str, value: str, requested: str) -> None:
+        if previous_value in self.added:
+            del self.added[previous_value]
+            self.added[value] = None
+            return
+        if previous_value in self.moved:
+            self.moved[value] = self.moved.pop(previous_value)
+        original = self.renamed.pop(previous_value, (previous_value,))[0]
+        if original != value:
+            self.renamed[value] = (original, requested)
+
+    def events(self) -> List[Event]:
+        from ..api.node import ShapeTreeNodeNameUpdateEvent
+        tree = self.key.shape_tree
+        nodes = tree.collection__internal__
+        result: List[Event] = [ShapeTreeNodeRemoveEvent(tree, name) for name in self.removed]
+
+        for name, (original, requested) in self.renamed.items():
+            node = nodes.get(name)
+            if node is not None:
+                result.append(ShapeTreeNodeNameUpdateEvent(node, requested, original))
+
+        for name in self.added:
+            node = nodes.get(name)
+            if node is not None:
+                result.append(ShapeTreeNodeAddEvent(node))
+
+        # Moves are kept even if the index is unchanged, the parent may not be
+        for name, previous_index in self.moved.items():
+            node = nodes.get(name)
+            if node is not None:
+                result.append(ShapeTreeNodeMoveEvent(node, node.index, previous_index))
+
+        return result
+
+
+def event_queue(tree: 'ShapeTree') -> ShapeTreeEventQueue:
+    key = tree.id_data
+    pointer = key.as_pointer()
+    queue = _queues.get(pointer)
+    if queue is None:
+        queue = _queues[pointer] = ShapeTreeEventQueue(key)
+    return queue
+
+
+@contextmanager
+def event_batch(deferred: bool=False) -> Iterator[None]:
+    # Queues node events until the outermost batch ends, then dispatches the
+    # net change to each node once. Deferred batches dispatch from a timer
+    # instead, so that several operations in a row share a single dispatch.
+    global _depth
+    _depth += 1
+    try:
+        yield
+    finally:
+        _depth -= 1
+        if not _depth:
+            if deferred:
+                from bpy.app import timers
+                if not timers.is_registered(events_flush):
+                    timers.register(events_flush, first_interval=0.0)
+            else:
+                events_flush()
+
+
+def events_flush() -> None:
+    global _queues
+    queues = _queues
+    _queues = {}
+    for queue in queues.values():
+        events = queue.events()
+        if events:
+            if _replay:
+                for event in events:
+                    dispatch_event(event)
+            dispatch_event(ShapeTreeUpdateEvent(queue.key.shape_tree, tuple(events)))
+
+
+def events_replay_enable() -> None:
+    # Also dispatches each node event of a flush on its own. Counted, so that
+    # every caller that enables it must disable it again.
+    global _replay
+    _replay += 1
+
+
+def events_replay_disable() -> None:
+    global _replay
+    _replay = max(_replay - 1, 0)
+
+
+def events_clear() -> None:
+    # Queued names are meaningless once undo or loading replaces the data
+    _queues.clear()
+
+
+def event_node_add(tree: 'ShapeTree', names: Iterable[str]) -> None:
+    queue = event_queue(tree)
+    for name in names:
+        queue.add(name)
+    if not _depth:
+        events_flush()
+
+
+def event_node_move(tree: 'ShapeTree', moves: Iterable[Tuple[str, int]]) -> None:
+    queue = event_queue(tree)
+    for name, previous_index in moves:
+        queue.move(name, previous_index)
+    if not _depth:
+        events_flush()
+
+
+def event_node_remove(tree: 'ShapeTree', names: Iterable[str]) -> None:
+    queue = event_queue(tree)
+    for name in names:
+        queue.remove(name)
+    if not _depth:
+        events_flush()
+
+
+def event_node_rename(tree: 'ShapeTree', previous_value: str, value: str, requested: str) -> None:
+    event_queue(tree).rename(previous_value, value, requested)
+    if not _depth:
+        events_flush()
@@ -0,0 +1,211 @@
+from itertools import combinations
+from typing import Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
+import numpy as np
+from .deltas import ShapeTreeDelta, key_delta, key_shapes_invalidate, relative_coordinates, shape_coordinates
+from .drivers import driver_assign, driver_batch, driver_get_or_create
+from .events import event_batch
+from .names import tree_names
+from .navigation import tree_index
+from .structure import tree_add_items, tree_items_validate
+if TYPE_CHECKING:
+    from bpy.types import Key, Object, ShapeKey
+    from ..api.node import ShapeTreeNode
+    from ..api.tree import ShapeTree
+
+
+def shape_create(object: 'Object', name: str, source: 'ShapeKey', coordinates: np.ndarray) -> 'ShapeKey':
+    shape = object.shape_key_add(name=name, from_mix=False)
+    shape.data.foreach_set("co", np.ascontiguousarray(coordinates, dtype=np.float32).reshape(-1))
+    shape.relative_key = source.relative_key
+    shape.vertex_group = source.vertex_group
+    key_shapes_invalidate(shape.id_data, (name,))
+    return shape
+
+
+def shape_value_path(name: str) -> str:
+    return f'key_blocks["{name}"].value'
+
+
+def shape_value_driver_create(key: 'Key',
+                              name: str,
+                              sources: Sequence[Tuple[str, str]],
+                              type: str,
+                              expression: str="") -> None:
+    # Generated shapes follow the values of the shapes they were made from,
+    # which the driver's (variable, shape name) sources also record. They
+    # aren't written by the evaluator so stay unmuted in every mode.
+    fcurve = driver_get_or_create(key, shape_value_path(name))
+    driver_assign(fcurve, [(variable, shape_value_path(source)) for variable, source in sources], type, expression)
+
+
+def items_validate(tree: 'ShapeTree',
+                   groups: Sequence[Tuple[Optional['ShapeTreeNode'], List[Tuple[str, str, int]]]],
+                   object: 'Object') -> None:
+    # Checks every (parent, items) group before any shape is created. Names
+    # are reserved as they are generated, so release them if a group can't
+    # be added.
+    try:
+        for parent, items in groups:
+            tree_items_validate(tree, items, parent, object)
+    except ValueError:
+        names = tree_names(tree)
+        for _, items in groups:
+            for _, name, _ in items:
+                names.discard(name)
+        raise
+
+
+def node_source_shape(node: 'ShapeTreeNode') -> 'ShapeKey':
+    shape = node.shape
+    if shape is None:
+        raise ValueError(f'Node "{node.name}" has no shape key')
+    return shape
+
+
+def combination_offsets(a: ShapeTreeDelta, b: ShapeTreeDelta) -> Tuple[np.ndarray, np.ndarray]:
+    # Corrective offsets for the vertices both shapes move. Where the offsets
+    # agree in direction on an axis the combination keeps the larger of the
+    # two rather than their sum, so the corrective starts out stopping the
+    # overlap from stacking and is refined from there.
+    indices, a_rows, b_rows = np.intersect1d(a.indices, b.indices, assume_unique=True, return_indices=True)
+    a_offsets = a.offsets[a_rows]
+    b_offsets = b.offsets[b_rows]
+    larger = np.where(np.abs(a_offsets) >= np.abs(b_offsets), a_offsets, b_offsets)
+    offsets = np.where(np.sign(a_offsets) == np.sign(b_offsets), larger - (a_offsets + b_offsets), 0.0)
+    return indices, offsets.astype(np.float32)
+
+
+def tree_combinations_add(tree: 'ShapeTree',
+                          object: 'Object',
+                          nodes: Sequence['ShapeTreeNode'],
+                          min_vertices: int=1) -> List['ShapeTreeNode']:
+    # Adds a combination corrective for every pair of nodes whose shapes move
+    # at least min_vertices of the same vertices. A combination sits under the
+    # shared parent of its pair, or at the root if they don't share one, and
+    # its value is the product of the values of the pair.
+    key = tree.id_data
+    names = tree_names(tree)
+    shapes = [(node, node_source_shape(node), key_delta(key, node.name)) for node in nodes]
+    pending: Dict[Optional[str], List[Tuple[str, str, int]]] = {}
+    planned = []
+
+    for (a, shape, a_delta), (b, _, b_delta) in combinations(shapes, 2):
+        indices, offsets = combination_offsets(a_delta, b_delta)
+        if len(indices) < max(min_vertices, 1):
+            continue
+
+        name = names.unique(f'{a.name}_{b.name}')
+        names.add(name)
+        planned.append((name, a.name, b.name, shape, indices, offsets))
+
+        parent = a.parent
+        parent = parent.name if parent is not None and parent == b.parent else None
+        pending.setdefault(parent, []).append(('COMBINATION', name, 0))
+
+    collection = tree.collection__internal__
+    items_validate(tree, [(collection.get(parent) if parent is not None else None, items)
+                          for parent, items in pending.items()], object)
+
+    for name, _, _, shape, indices, offsets in planned:
+        coordinates = relative_coordinates(key, shape).copy()
+        coordinates[indices] += offsets
+        shape_create(object, name, shape, coordinates)
+
+    with event_batch():
+        for parent, items in pending.items():
+            # Parents are looked up again as adding nodes moves the collection
+            parent = collection.get(parent) if parent is not None else None
+            tree_add_items(tree, items, parent, object)
+
+    with driver_batch(key):
+        for name, a, b, _, _, _ in planned:
+            shape_value_driver_create(key, name, [("a", a), ("b", b)], 'SCRIPTED', "a*b")
+
+    cache = tree_index(tree)
+    return [collection[cache.position(name)] for name, *_ in planned]
+
+
+def node_xyz_split(tree: 'ShapeTree', object: 'Object', node: 'ShapeTreeNode') -> List['ShapeTreeNode']:
+    # Splits a shape into one shape per axis, each moving its vertices along
+    # that axis only and following the value of the node's shape. The new
+    # nodes are added alongside the node and record it as their "source".
+    # The node's shape is muted rather than its value driver, so its value
+    # still drives the components while only they deform the mesh.
+    key = tree.id_data
+    names = tree_names(tree)
+    shape = node_source_shape(node)
+    source = node.name
+    parent = node.parent
+
+    # Components of an earlier split would deform the mesh along with new ones
+    if shape.mute or any(item.get("source") == source for item in node.siblings):
+        raise ValueError(f'Node "{source}" has already been split')
+
+    items = []
+    for suffix in "XYZ":
+        name = names.unique(f'{source}_{suffix}')
+        names.add(name)
+        items.append(('XYZ', name, 0))
+
+    items_validate(tree, [(parent, items)], object)
+
+    basis = relative_coordinates(key, shape)
+    coordinates = shape_coordinates(shape)
+    for axis, (_, name, _) in enumerate(items):
+        component = basis.copy()
+        component[:, axis] = coordinates[:, axis]
+        shape_create(object, name, shape, component)
+
+    result = tree_add_items(tree, items, parent, object)
+    shape.mute = True
+
+    with driver_batch(key):
+        for item, (_, name, _) in zip(result, items):
+            item["source"] = source
+            shape_value_driver_create(key, name, [("v", source)], 'AVERAGE')
+
+    return result
+
+
+def node_inbetweens_add(tree: 'ShapeTree',
+                        object: 'Object',
+                        node: 'ShapeTreeNode',
+                        count: int=1) -> List['ShapeTreeNode']:
+    # Adds in-between children at evenly spaced fractions of the node's shape.
+    # Each stores its fraction as "factor" and peaks when the node's shape
+    # reaches it, fading out towards the neighbouring fractions. The node's
+    # shape already moves factor*delta at the peak, so in-betweens start out
+    # as zero correctives that only hold the offset from there.
+    key = tree.id_data
+    names = tree_names(tree)
+    shape = node_source_shape(node)
+    source = node.name
+    factors = [step / (count + 1) for step in range(1, count + 1)]
+    items = []
+
+    for factor in factors:
+        name = names.unique(f'{source}_{round(factor * 100):03d}')
+        names.add(name)
+        items.append(('INBETWEEN', name, 0))
+
+    items_validate(tree, [(node, items)], object)
+
+    basis = relative_coordinates(key, shape)
+    for _, name, _ in items:
+        shape_create(object, name, shape, basis)
+
+    result = tree_add_items(tree, items, node, object)
+    bounds = [0.0] + factors + [1.0]
+
+    with driver_batch(key):
+        for row, (item, (_, name, _)) in enumerate(zip(result, items)):
+            lower, factor, upper = bounds[row:row + 3]
+            item["factor"] = factor
+            shape_value_driver_create(key,
+                                      name,
+                                      [("v", source)],
+                                      'SCRIPTED',
+                                      f'max(0.0,min((v-{lower:.6g})/{factor - lower:.6g},'
+                                      f'({upper:.6g}-v)/{upper - factor:.6g}))')
+
+    return result
@@ -0,0 +1,93 @@
+import sys
+from bpy.app import handlers
+from bpy.app.handlers import persistent
+
+# Handlers are registered with the add-on, the modules they call into are
+# imported the first time they run. Caches only exist once their module is
+# imported, so only loaded modules are cleared.
+CACHE_CLEAR_FUNCTIONS = [
+    ("navigation", "tree_index_clear"),
+    ("names", "tree_names_clear"),
+    ("search", "tree_search_clear"),
+    ("resolve", "resolve_cache_clear"),
+    ("validation", "validation_clear"),
+    ("visibility", "tree_visibility_clear"),
+    ("events", "events_clear"),
+    ("evaluate", "tree_evaluator_clear"),
+    ("deltas", "deltas_clear"),
+    ]
+
+
+@persistent
+def cache_clear_handler(*_) -> None:
+    for name, function in CACHE_CLEAR_FUNCTIONS:
+        module = sys.modules.get(f'{__package__}.{name}')
+        if module is not None:
+            getattr(module, function)()
+
+
+@persistent
+def depsgraph_update_handler(_, depsgraph) -> None:
+    from bpy.types import Key, Object
+    keys = [update.id.original for update in depsgraph.updates if isinstance(update.id, Key)]
+    if keys:
+        from .validation import validation_schedule
+        validation_schedule(keys)
+
+    # Shape edits show up as geometry updates of the objects using the key
+    deltas = sys.modules.get(f'{__package__}.deltas')
+    if deltas is not None:
+        for update in depsgraph.updates:
+            if update.is_updated_geometry and isinstance(update.id, Object):
+                object = update.id.original
+                if getattr(object.data, "shape_keys", None) is not None:
+                    deltas.object_deltas_update(object)
+
+
+@persistent
+def evaluation_handler(*_) -> None:
+    from bpy import data
+    for key in data.shape_keys:
+        tree = key.shape_tree
+        if tree.evaluation_mode != 'DRIVERS' and key.library is None:
+            from .evaluate import tree_evaluate
+            tree_evaluate(tree)
+
+
+@persistent
+def validation_handler(*_) -> None:
+    from bpy import data
+    from .validation import validation_schedule
+    validation_schedule(data.shape_keys)
+
+
+HANDLERS = [
+    (handlers.load_post, cache_clear_handler),
+    (handlers.load_post, validation_handler),
+    (handlers.undo_post, cache_clear_handler),
+    (handlers.undo_post, validation_handler),
+    (handlers.redo_post, cache_clear_handler),
+    (handlers.redo_post, validation_handler),
+    (handlers.frame_change_post, evaluation_handler),
+    (handlers.depsgraph_update_post, depsgraph_update_handler),
+    (handlers.depsgraph_update_post, evaluation_handler),
+    ]
+
+
+def register() -> None:
+    for handler_list, handler in HANDLERS:
+        if handler not in handler_list:
+            handler_list.append(handler)
+
+
+def unregister() -> None:
+    from bpy.app import timers
+    from .events import events_flush
+    from .validation import validation_timer
+    for timer in (events_flush, validation_timer):
+        if timers.is_registered(timer):
+            timers.unregister(timer)
+
+    for handler_list, handler in HANDLERS:
+        if handler in handler_list:
+            handler_list.remove(handler)
@@ -0,0 +1,441 @@
+import re
+from fnmatch import translate
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Pure-Python tree logic with no dependency on bpy, so that it can be tested
+# and benchmarked outside of Blender. The runtime caches (tree index, names,
+# search and visibility) are built on it. Structural edits are written to the
+# collection directly and applied to the cached model in place, which is
+# then kept through tree_invalidate rather than rebuilt from every node.
+# Keep imports here limited to the standard library.
+
+
+def name_split(name: str) -> Tuple[str, int]:
+    base, sep, suffix = name.rpartition(".")
+    if sep and len(suffix) >= 3 and suffix.isdigit():
+        return base, int(suffix)
+    return name, 0
+
+
+@lru_cache(maxsize=32)
+def name_matcher(pattern: str) -> Callable[[str], bool]:
+    pattern = pattern.lower()
+    if any(char in pattern for char in "*?["):
+        return re.compile(translate(pattern)).match
+    return lambda name: pattern in name
+
+
+@lru_cache(maxsize=32)
+def name_replacer(pattern: str, replacement: str, mode: str='WILDCARD') -> Callable[[str], Optional[str]]:
+    # Returns a function mapping a name to its new name, or None if the name
+    # doesn't match. WILDCARD patterns must match the whole name and each * or
+    # ? in the replacement takes the text matched by the next one in the
+    # pattern, so "L_brow_*" -> "brow_L_*". REGEX patterns use re.sub.
+    if mode == 'REGEX':
+        expression = re.compile(pattern)
+
+        def replace(name: str) -> Optional[str]:
+            value, count = expression.subn(replacement, name)
+            return value if count else None
+        return replace
+
+    groups = 0
+    parts = []
+    for char in pattern:
+        if char == '*':
+            parts.append("(.*?)")
+            groups += 1
+        elif char == '?':
+            parts.append("(.)")
+            groups += 1
+        else:
+            parts.append(re.escape(char))
+
+    template = []
+    group = 0
+    for char in replacement:
+        if char in '*?':
+            group += 1
+            if group > groups:
+                raise ValueError(f'Replacement "{replacement}" has more wildcards than pattern "{pattern}"')
+            template.append(f'\\g<{group}>')
+        else:
+            template.append(char.replace("\\", "\\\\"))
+
+    expression = re.compile("".join(parts), re.DOTALL)
+    template = "".join(template)
+
+    def replace(name: str) -> Optional[str]:
+        match = expression.fullmatch(name)
+        return match.expand(template) if match else None
+    return replace
+
+
+def block_move(items, start: int, end: int, target: int) -> int:
+    # Moves items[start:end] so that it sits before the item currently at
+    # target, using as few moves as the smaller of the block and the items it
+    # passes over. items only needs the move(from, to) of a bpy collection.
+    # Returns the new start of the block.
+    if target < start:
+        if end - start <= start - target:
+            for offset in range(end - start):
+                items.move(start + offset, target + offset)
+        else:
+            for _ in range(start - target):
+                items.move(target, end - 1)
+        return target
+
+    if target > end:
+        if end - start <= target - end:
+            for _ in range(end - start):
+                items.move(start, target - 1)
+        else:
+            for offset in range(target - end):
+                items.move(end + offset, start + offset)
+        return target - (end - start)
+
+    return start
+
+
+class ShapeTreeNameRegistry:
+    # Reference counted names shared by shape keys and tree nodes, with a
+    # per-base hint of how many consecutive numeric suffixes are taken.
+
+    __slots__ = ("names", "suffix", "size")
+
+    def __init__(self, names: Iterable[str], size: Tuple[int, int]=(0, 0)) -> None:
+        self.names: Dict[str, int] = {}
+        self.suffix: Dict[str, int] = {}
+        self.size = size
+        for name in names:
+            self.add(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.names
+
+    def add(self, name: str) -> None:
+        names = self.names
+        names[name] = names.get(name, 0) + 1
+
+    def discard(self, name: str) -> None:
+        names = self.names
+        count = names.get(name, 0)
+        if count > 1:
+            names[name] = count - 1
+        elif count == 1:
+            del names[name]
+            base, index = name_split(name)
+            if index and self.suffix.get(base, 0) >= index:
+                self.suffix[base] = index - 1
+
+    def unique(self, name: str) -> str:
+        names = self.names
+        if name not in names:
+            return name
+        index = self.suffix.get(name, 0)
+        value = name
+        while value in names:
+            index += 1
+            value = f'{name}.{str(index).zfill(3)}'
+        self.suffix[name] = index - 1
+        return value
+
+    def rename_all(self,
+                   names: Sequence[str],
+                   values: Sequence[str],
+                   counts: Sequence[int]) -> List[str]:
+        # Renames held names in one pass and returns the unique new names.
+        # Every old name is released first so that names can be swapped.
+        for name, count in zip(names, counts):
+            for _ in range(count):
+                self.discard(name)
+        result = []
+        for value, count in zip(values, counts):
+            value = self.unique(value)
+            for _ in range(count):
+                self.add(value)
+            result.append(value)
+        return result
+
+
+class ShapeTreeModel:
+    # Parent/child/sibling tables for a flat, depth-first ordered node list.
+    # Built in a single pass from the node depths and looked up by position.
+
+    __slots__ = ("generation",
+                 "names",
+                 "lookup",
+                 "depth",
+                 "parent",
+                 "first_child",
+                 "next_sibling",
+                 "previous_sibling",
+                 "subtree_end")
+
+    def __init__(self, names: Sequence[str], depths: Sequence[int], generation: int=0) -> None:
+        self.generation = generation
+        self.names = list(names)
+        self.depth = list(depths)
+        self.update()
+
+    def __len__(self) -> int:
+        return len(self.depth)
+
+    def update(self) -> None:
+        depths = self.depth
+        count = len(depths)
+
+        parent = [-1] * count
+        first_child = [-1] * count
+        next_sibling = [-1] * count
+        previous_sibling = [-1] * count
+        subtree_end = [count] * count
+        last_child = [-1] * count
+        last_root = -1
+        stack = []
+
+        for index, depth in enumerate(depths):
+            while stack and depths[stack[-1]] >= depth:
+                subtree_end[stack.pop()] = index
+
+            if stack:
+                owner = stack[-1]
+                parent[index] = owner
+                prev = last_child[owner]
+                last_child[owner] = index
+                if prev == -1:
+                    first_child[owner] = index
+            else:
+                prev = last_root
+                last_root = index
+
+            if prev != -1:
+                next_sibling[prev] = index
+                previous_sibling[index] = prev
+
+            stack.append(index)
+
+        self.lookup = {name: index for index, name in enumerate(self.names)}
+        self.parent = parent
+        self.first_child = first_child
+        self.next_sibling = next_sibling
+        self.previous_sibling = previous_sibling
+        self.subtree_end = subtree_end
+
+    # Editing
+
+    def insert(self, name: str, parent: int) -> int:
+        # Adds a node as the last child of parent, or as the last root if
+        # parent is -1, and returns its position. Positions after it shift
+        # along by one, and only the ancestor chain grows its subtree.
+        index = self.insert_position(parent)
+        depth = 0 if parent == -1 else self.depth[parent] + 1
+
+        if parent == -1:
+            previous = index - 1
+            while previous != -1 and self.parent[previous] != -1:
+                previous = self.parent[previous]
+        else:
+            previous = self.last_child(parent)
+
+        def shift(items: List[int]) -> List[int]:
+            return [item + 1 if item >= index else item for item in items]
+
+        self.parent = shift(self.parent)
+        self.first_child = shift(self.first_child)
+        self.next_sibling = shift(self.next_sibling)
+        self.previous_sibling = shift(self.previous_sibling)
+        # Subtrees ending at the insert point only grow if they contain it
+        self.subtree_end = [end + 1 if end > index else end for end in self.subtree_end]
+        if parent != -1:
+            for ancestor in [parent] + self.ancestors(parent):
+                if self.subtree_end[ancestor] == index:
+                    self.subtree_end[ancestor] = index + 1
+
+        self.names.insert(index, name)
+        self.depth.insert(index, depth)
+        self.parent.insert(index, parent)
+        self.first_child.insert(index, -1)
+        self.next_sibling.insert(index, -1)
+        self.previous_sibling.insert(index, previous)
+        self.subtree_end.insert(index, index + 1)
+
+        if previous != -1:
+            self.next_sibling[previous] = index
+        elif parent != -1:
+            self.first_child[parent] = index
+
+        # Only the names from the insert point on change position
+        self.lookup.update(zip(self.names[index:], range(index, len(self.names))))
+        return index
+
+    def remove(self, index: int) -> None:
+        # Removes the node at index along with its subtree
+        end = self.subtree_end[index]
+        count = end - index
+        parent = self.parent[index]
+        previous = self.previous_sibling[index]
+        following = self.next_sibling[index]
+
+        if previous != -1:
+            self.next_sibling[previous] = following
+        elif parent != -1:
+            self.first_child[parent] = following
+        if following != -1:
+            self.previous_sibling[following] = previous
+
+        def shift(items: List[int]) -> List[int]:
+            del items[index:end]
+            return [item - count if item >= end else item for item in items]
+
+        for name in self.names[index:end]:
+            del self.lookup[name]
+        del self.names[index:end]
+        del self.depth[index:end]
+        self.parent = shift(self.parent)
+        self.first_child = shift(self.first_child)
+        self.next_sibling = shift(self.next_sibling)
+        self.previous_sibling = shift(self.previous_sibling)
+        self.subtree_end = shift(self.subtree_end)
+
+        self.lookup.update(zip(self.names[index:], range(index, len(self.names))))
+
+    def move(self, start: int, end: int, target: int, delta: int=0) -> int:
+        # Mirrors block_move for the nodes[start:end], changing their depths
+        # by delta, and returns the new start of the block. Moves reorder the
+        # tree so the tables are derived again, but from the cached names and
+        # depths rather than from the nodes.
+        names = self.names
+        depths = self.depth
+        block = (names[start:end], [depth + delta for depth in depths[start:end]])
+        if target < start:
+            names[target:end] = block[0] + names[target:start]
+            depths[target:end] = block[1] + depths[target:start]
+            index = target
+        elif target > end:
+            names[start:target] = names[end:target] + block[0]
+            depths[start:target] = depths[end:target] + block[1]
+            index = target - (end - start)
+        else:
+            depths[start:end] = block[1]
+            index = start
+        self.update()
+        return index
+
+    # Navigation
+
+    def ancestors(self, index: int) -> List[int]:
+        result = []
+        parent = self.parent
+        index = parent[index]
+        while index != -1:
+            result.append(index)
+            index = parent[index]
+        return result
+
+    def children(self, index: int) -> Iterator[int]:
+        next_sibling = self.next_sibling
+        index = self.first_child[index]
+        while index != -1:
+            yield index
+            index = next_sibling[index]
+
+    def insert_position(self, parent: int) -> int:
+        # Where a new last child of parent goes, or a new root if parent is -1
+        return len(self.depth) if parent == -1 else self.subtree_end[parent]
+
+    def extent(self, index: int) -> int:
+        return self.subtree_end[index] - index - 1
+
+    def is_ancestor_of(self, index: int, other: int) -> bool:
+        return index < other < self.subtree_end[index]
+
+    def last_child(self, index: int) -> int:
+        result = -1
+        for result in self.children(index):
+            pass
+        return result
+
+    def length(self, index: int) -> int:
+        return sum(1 for _ in self.children(index))
+
+    def position(self, name: str) -> int:
+        return self.lookup.get(name, -1)
+
+    def siblings(self, index: int) -> List[int]:
+        parent = self.parent[index]
+        if parent == -1:
+            result = []
+            other = 0
+            while other < len(self.depth):
+                result.append(other)
+                other = self.subtree_end[other]
+        else:
+            result = list(self.children(parent))
+        result.remove(index)
+        return result
+
+    def subtree(self, index: int) -> range:
+        return range(index, self.subtree_end[index])
+
+    # Names
+
+    def rename(self, previous_value: str, value: str) -> None:
+        lookup = self.lookup
+        index = lookup.pop(previous_value, -1)
+        if index != -1:
+            lookup[value] = index
+            self.names[index] = value
+
+    # Visibility
+
+    def match(self,
+              pattern: str="",
+              types: Optional[FrozenSet[int]]=None,
+              codes: Optional[Sequence[int]]=None,
+              invert: bool=False,
+              names: Optional[Sequence[str]]=None) -> List[int]:
+        # Positions of the nodes whose (lowercase) name matches the pattern
+        # and whose type code is one of types.
+        result = range(len(self.depth))
+        if pattern:
+            matches = name_matcher(pattern)
+            if names is None:
+                names = [name.lower() for name in self.names]
+            result = [index for index in result if bool(matches(names[index])) != invert]
+        if types is not None and codes is not None:
+            result = [index for index in result if codes[index] in types]
+        return list(result)
+
+    def visibility(self,
+                   flag: int,
+                   expanded: Callable[[int], bool],
+                   matches: Optional[Iterable[int]]=None,
+                   invert: bool=False) -> List[int]:
+        count = len(self.depth)
+        flags = [0] * count
+
+        if matches is not None:
+            # Matches are shown regardless of expansion, along with the groups
+            # they belong to so that they keep their place in the hierarchy.
+            parent = self.parent
+            for index in matches:
+                while index != -1 and not flags[index]:
+                    flags[index] = flag
+                    index = parent[index]
+        else:
+            end = self.subtree_end
+            index = 0
+
+            # Collapsed nodes jump straight past their descendants
+            while index < count:
+                flags[index] = flag
+                index = index + 1 if expanded(index) else end[index]
+
+        # The list inverts the returned flags itself when invert is enabled, so
+        # flip them to keep ancestors of the (inverted) matches visible.
+        if invert:
+            flags = [flag ^ item for item in flags]
+
+        return flags
@@ -0,0 +1,39 @@
+from typing import Dict, TYPE_CHECKING
+from .model import ShapeTreeNameRegistry
+if TYPE_CHECKING:
+    from ..api.tree import ShapeTree
+
+_cache: Dict[int, ShapeTreeNameRegistry] = {}
+
+
+def tree_names(tree: 'ShapeTree', rebuild: bool=False) -> ShapeTreeNameRegistry:
+    key_blocks = tree.id_data.key_blocks
+    nodes = tree.collection__internal__
+    pointer = tree.id_data.as_pointer()
+    size = (len(key_blocks), len(nodes))
+    cached = _cache.get(pointer)
+    if rebuild or cached is None or cached.size != size:
+        names = key_blocks.keys()
+        names.extend(nodes.keys())
+        cached = ShapeTreeNameRegistry(names, size)
+        _cache[pointer] = cached
+    return cached
+
+
+def tree_names_clear() -> None:
+    _cache.clear()
+
+
+def tree_names_sync(tree: 'ShapeTree') -> None:
+    # Marks a registry that has been kept up to date with add/discard as
+    # matching the current number of shape keys and nodes.
+    cached = _cache.get(tree.id_data.as_pointer())
+    if cached is not None:
+        cached.size = (len(tree.id_data.key_blocks), len(tree.collection__internal__))
+
+
+def tree_names_rename(tree: 'ShapeTree', previous_value: str, value: str) -> None:
+    cached = _cache.get(tree.id_data.as_pointer())
+    if cached is not None:
+        cached.discard(previous_value)
+        cached.add(value)
@@ -0,0 +1,40 @@
+from itertools import count
+from typing import Dict, Optional, TYPE_CHECKING
+from .model import ShapeTreeModel
+if TYPE_CHECKING:
+    from ..api.tree import ShapeTree
+
+_generation = count(1)
+_cache: Dict[int, ShapeTreeModel] = {}
+
+
+def tree_index(tree: 'ShapeTree') -> ShapeTreeModel:
+    nodes = tree.collection__internal__
+    generation = tree.generation
+    pointer = tree.id_data.as_pointer()
+    cached = _cache.get(pointer)
+    if cached is None or cached.generation != generation or len(cached) != len(nodes):
+        cached = ShapeTreeModel(nodes.keys(), [node.get("depth", 0) for node in nodes], generation)
+        _cache[pointer] = cached
+    return cached
+
+
+def tree_index_clear() -> None:
+    _cache.clear()
+
+
+def tree_index_rename(tree: 'ShapeTree', previous_value: str, value: str) -> None:
+    cached = _cache.get(tree.id_data.as_pointer())
+    if cached is not None:
+        cached.rename(previous_value, value)
+
+
+def tree_invalidate(tree: 'ShapeTree', index: Optional[ShapeTreeModel]=None) -> None:
+    # Generations are unique for the session so that a structure restored by
+    # undo never matches an index that was built for a different structure.
+    # An index that was edited along with the collection is kept for the new
+    # generation, everything else keyed on the generation is rebuilt.
+    generation = tree.generation = next(_generation)
+    if index is not None:
+        index.generation = generation
+        _cache[tree.id_data.as_pointer()] = index
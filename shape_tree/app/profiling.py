@@ -0,0 +1,151 @@
+import sys
+from collections import deque
+from functools import wraps
+from time import perf_counter
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+# Opt-in instrumentation. The decorator only records the function, wrappers
+# are swapped in when profiling is enabled and the originals put back when it
+# is disabled, so that hot paths pay nothing while profiling is off.
+
+PROFILE_BUFFER_SIZE = 4096
+
+_hooks: List[Callable] = []
+_patches: List[Tuple[Any, str, Any]] = []
+_records: Deque['ShapeTreeProfileRecord'] = deque(maxlen=PROFILE_BUFFER_SIZE)
+_stats: Dict[str, 'ShapeTreeProfileStat'] = {}
+_stack: List[int] = []
+_rna_types: Tuple[type, ...] = ()
+_previous_profiler: Optional[Callable] = None
+
+
+class ShapeTreeProfileRecord(NamedTuple):
+    name: str
+    start: float
+    duration: float
+    rna: int
+
+
+class ShapeTreeProfileStat:
+
+    __slots__ = ("calls", "time", "rna")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.time = 0.0
+        self.rna = 0
+
+
+def profiled(function: Callable) -> Callable:
+    # Marks a function, method or property getter for instrumentation. Apply
+    # it beneath @property so that the getter is what gets recorded.
+    _hooks.append(function)
+    return function
+
+
+def profile_wrap(function: Callable) -> Callable:
+    name = function.__qualname__
+    stack = _stack
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        stack.append(0)
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            duration = perf_counter() - start
+            rna = stack.pop()
+            if stack:
+                stack[-1] += rna
+            _records.append(ShapeTreeProfileRecord(name, start, duration, rna))
+            stat = _stats.get(name)
+            if stat is None:
+                stat = _stats[name] = ShapeTreeProfileStat()
+            stat.calls += 1
+            stat.time += duration
+            stat.rna += rna
+
+    return wrapper
+
+
+def profile_rna_counter(_, event: str, arg: Any) -> None:
+    # Only calls into bpy structs and collections (get, keys, foreach_get,
+    # driver_add...) are visible here, plain attribute reads are not.
+    if event == 'c_call' and _stack and isinstance(getattr(arg, "__self__", None), _rna_types):
+        _stack[-1] += 1
+
+
+def profile_patch(owner: Any, attribute: str, value: Any) -> None:
+    _patches.append((owner, attribute, owner.__dict__[attribute] if isinstance(owner, type) else getattr(owner, attribute)))
+    setattr(owner, attribute, value)
+
+
+def profile_enabled() -> bool:
+    return bool(_patches)
+
+
+def profile_enable(rna: bool=False) -> None:
+    global _rna_types, _previous_profiler
+    profile_disable()
+
+    wrappers = {}
+    for function in _hooks:
+        wrapper = profile_wrap(function)
+        wrappers[id(function)] = (function, wrapper)
+
+        # The definition itself, a module global, method or property getter
+        owner = sys.modules.get(function.__module__)
+        path = function.__qualname__.split(".")
+        for part in path[:-1]:
+            owner = getattr(owner, part, None)
+        if owner is None:
+            continue
+        attribute = path[-1]
+        value = owner.__dict__.get(attribute) if isinstance(owner, type) else getattr(owner, attribute, None)
+        if value is function:
+            profile_patch(owner, attribute, wrapper)
+        elif isinstance(value, property) and value.fget is function:
+            profile_patch(owner, attribute, property(wrapper, value.fset, value.fdel, value.__doc__))
+
+    # Copies made by from-imports in the rest of the package
+    root = __package__.rpartition(".")[0]
+    for name, module in list(sys.modules.items()):
+        if module is not None and (name == root or name.startswith(f'{root}.')):
+            for attribute, value in list(vars(module).items()):
+                entry = wrappers.get(id(value))
+                if entry is not None and entry[0] is value:
+                    profile_patch(module, attribute, entry[1])
+
+    if rna:
+        from bpy.types import bpy_prop_collection, bpy_struct
+        _rna_types = (bpy_struct, bpy_prop_collection)
+        _previous_profiler = sys.getprofile()
+        sys.setprofile(profile_rna_counter)
+
+
+def profile_disable() -> None:
+    global _rna_types, _previous_profiler
+    if _rna_types:
+        sys.setprofile(_previous_profiler)
+        _rna_types = ()
+        _previous_profiler = None
+    while _patches:
+        owner, attribute, value = _patches.pop()
+        setattr(owner, attribute, value)
+    _stack.clear()
+
+
+def profile_clear() -> None:
+    _records.clear()
+    _stats.clear()
+
+
+def profile_records() -> List[ShapeTreeProfileRecord]:
+    return list(_records)
+
+
+def profile_report(limit: Optional[int]=None) -> List[Tuple[str, ShapeTreeProfileStat]]:
+    # Instrumented functions by cumulative time, slowest first
+    result = sorted(_stats.items(), key=lambda item: item[1].time, reverse=True)
+    return result[:limit] if limit is not None else result
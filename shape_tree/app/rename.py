@@ -0,0 +1,122 @@
+import sys
+from typing import Collection, Dict, List, Optional, Tuple, TYPE_CHECKING
+from ..api.node import NODE_TYPE_DATA, NODE_TYPE_TABLE, node_is_generated
+from .events import event_batch, event_node_rename
+from .model import name_replacer
+from .names import tree_names, tree_names_sync
+from .navigation import tree_index, tree_invalidate
+if TYPE_CHECKING:
+    from ..api.node import ShapeTreeNode
+    from ..api.tree import ShapeTree
+
+# Key block names are stored in a fixed size buffer by Blender
+NAME_MAX_BYTES = 63
+
+
+def tree_nodes_rename(tree: 'ShapeTree',
+                      pattern: str,
+                      replacement: str,
+                      mode: str='WILDCARD',
+                      root: Optional['ShapeTreeNode']=None,
+                      types: Optional[Collection[str]]=None) -> Dict[str, str]:
+    # Renames the matching nodes of the tree, or of the subtree under root,
+    # along with their shape keys. Returns the new name of each renamed node.
+    key = tree.id_data
+    nodes = tree.collection__internal__
+    cache = tree_index(tree)
+    replace = name_replacer(pattern, replacement, mode)
+    codes = None if types is None else {NODE_TYPE_TABLE[type] for type in types}
+    indices = range(len(nodes)) if root is None else cache.subtree(cache.position(root.name))
+
+    # Nodes with an entry in another add-on's collection are named by the
+    # add-on, renaming them here would leave the entry behind
+    owned = {NODE_TYPE_TABLE[type] for type in NODE_TYPE_DATA}
+
+    matches: List[Tuple[int, str, str]] = []
+    for index in indices:
+        name = cache.names[index]
+        code = nodes[index].get("type", 0)
+        if codes is None or code in codes:
+            value = replace(name)
+            if value and value != name:
+                if code in owned and not node_is_generated(nodes[index]):
+                    continue
+                matches.append((index, name, value))
+
+    if not matches:
+        return {}
+
+    # Shape nodes share their name with a key block, both hold it in the registry
+    blocks = dict(zip(key.key_blocks.keys(), key.key_blocks))
+    group = NODE_TYPE_TABLE['GROUP']
+    shapes = [nodes[index].get("type", 0) != group and name in blocks for index, name, _ in matches]
+    names = tree_names(tree, rebuild=True)
+    values = names.rename_all([name for _, name, _ in matches],
+                              [value for _, _, value in matches],
+                              [2 if shape else 1 for shape in shapes])
+
+    # Checked once suffixes are added, as Blender would truncate a longer
+    # key block name and leave the node with a name its shape doesn't have
+    for (_, name, _), value in zip(matches, values):
+        if len(value.encode("utf-8")) > NAME_MAX_BYTES:
+            tree_names(tree, rebuild=True)
+            raise ValueError(f'New name "{value}" for node "{name}" is too long')
+
+    renames = [(index, name, value, shape) for (index, name, _), value, shape in zip(matches, values, shapes)]
+
+    # Blender renames a key block to "name.001" if another block still has
+    # the name, so blocks that take a name being released go via a temporary
+    # name. Blender rewrites the driver and action paths of each block itself.
+    released = {name for _, name, _, shape in renames if shape}
+    pending = []
+    for index, name, value, shape in renames:
+        if shape:
+            block = blocks[name]
+            if value in released:
+                temporary = names.unique(f'~{index}')
+                names.add(temporary)
+                block.name = temporary
+                names.discard(temporary)
+                pending.append((block, value))
+            else:
+                block.name = value
+
+    for block, value in pending:
+        block.name = value
+
+    # Deltas are cached by shape name, drop both sides of every rename
+    deltas = sys.modules.get(f'{__package__}.deltas')
+    if deltas is not None:
+        deltas.key_shapes_invalidate(key, [name for _, name, _, _ in renames] + values)
+
+    with event_batch():
+        for index, name, value, _ in renames:
+            node = nodes[index]
+            node["name"] = value
+            if "data_path" in node:
+                node["data_path"] = f'{NODE_TYPE_DATA[node.type]}["{value}"]'
+            event_node_rename(tree, name, value, value)
+
+        # Split components record the name of the node they were split from
+        sources = {name: value for _, name, value, _ in renames}
+        for node in nodes:
+            source = node.get("source")
+            if source in sources:
+                node["source"] = sources[source]
+
+        # Drivers of shape nodes without a key block aren't updated by Blender
+        paths = {f'key_blocks["{name}"]': f'key_blocks["{value}"]'
+                 for index, name, value, shape in renames
+                 if not shape and nodes[index].get("type", 0) != group}
+        animdata = key.animation_data
+        if paths and animdata is not None:
+            for fcurve in animdata.drivers:
+                head, sep, tail = fcurve.data_path.partition("]")
+                path = paths.get(head + sep)
+                if path is not None:
+                    fcurve.data_path = path + tail
+
+        tree_names_sync(tree)
+        tree_invalidate(tree)
+
+    return {name: value for _, name, value, _ in renames}
@@ -0,0 +1,56 @@
+from typing import Dict, NamedTuple, Optional, Tuple, TYPE_CHECKING
+if TYPE_CHECKING:
+    from bpy.types import ShapeKey
+    from ..api.node import ShapeTreeNode
+
+_cache: Dict[int, Tuple[Tuple[int, int], Dict[str, 'ShapeTreeNodeResolution']]] = {}
+
+
+class ShapeTreeNodeResolution(NamedTuple):
+    influence_property_path: Optional[str]
+    weight_property_path: Optional[str]
+    shape_index: int
+
+
+def node_resolve(node: 'ShapeTreeNode') -> ShapeTreeNodeResolution:
+    # Only paths and indices are kept, never the structs themselves. Entries
+    # last until the structure of the tree or the number of shape keys
+    # changes, or until undo and file load clear the cache.
+    key = node.id_data
+    name = node.name
+    pointer = key.as_pointer()
+    signature = (key.shape_tree.generation, len(key.key_blocks))
+    cached = _cache.get(pointer)
+    if cached is None or cached[0] != signature:
+        cached = _cache[pointer] = (signature, {})
+    cache = cached[1]
+    try:
+        return cache[name]
+    except KeyError: pass
+
+    data = node.data
+    result = ShapeTreeNodeResolution(data.influence_property_path if data is not None else None,
+                                     data.weight_property_path if data is not None else None,
+                                     key.key_blocks.find(name) if node.is_shape else -1)
+    cache[name] = result
+    return result
+
+
+def node_resolve_shape(node: 'ShapeTreeNode') -> Optional['ShapeKey']:
+    index = node_resolve(node).shape_index
+    if index != -1:
+        key_blocks = node.id_data.key_blocks
+        shape = key_blocks[index]
+        if shape.name == node.name:
+            return shape
+        # Shape keys were reordered or renamed outside of the tree
+        cached = _cache.get(node.id_data.as_pointer())
+        if cached is not None:
+            cached[1].pop(node.name, None)
+        index = node_resolve(node).shape_index
+        if index != -1:
+            return key_blocks[index]
+
+
+def resolve_cache_clear() -> None:
+    _cache.clear()
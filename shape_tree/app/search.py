@@ -0,0 +1,55 @@
+from typing import Dict, FrozenSet, List, Optional, TYPE_CHECKING
+from .model import ShapeTreeModel
+from .navigation import tree_index
+if TYPE_CHECKING:
+    from ..api.tree import ShapeTree
+
+_cache: Dict[int, 'ShapeTreeSearchIndex'] = {}
+
+
+class ShapeTreeSearchIndex:
+    # Lowercase names and type codes in collection order. The version changes
+    # with every rename so that cached filter results can be discarded.
+
+    __slots__ = ("generation", "names", "types", "version")
+
+    def __init__(self, tree: 'ShapeTree') -> None:
+        nodes = tree.collection__internal__
+        self.generation = tree.generation
+        self.names = [name.lower() for name in nodes.keys()]
+        self.types = [node.get("type", 0) for node in nodes]
+        self.version = 0
+
+    def match(self,
+              model: ShapeTreeModel,
+              pattern: str="",
+              types: Optional[FrozenSet[int]]=None,
+              invert: bool=False) -> List[int]:
+        return model.match(pattern, types, self.types, invert, self.names)
+
+    def rename(self, index: int, value: str) -> None:
+        self.names[index] = value.lower()
+        self.version += 1
+
+
+def tree_search(tree: 'ShapeTree') -> ShapeTreeSearchIndex:
+    pointer = tree.id_data.as_pointer()
+    cached = _cache.get(pointer)
+    if (cached is None
+            or cached.generation != tree.generation
+            or len(cached.names) != len(tree.collection__internal__)):
+        cached = ShapeTreeSearchIndex(tree)
+        _cache[pointer] = cached
+    return cached
+
+
+def tree_search_clear() -> None:
+    _cache.clear()
+
+
+def tree_search_rename(tree: 'ShapeTree', value: str) -> None:
+    cached = _cache.get(tree.id_data.as_pointer())
+    if cached is not None and cached.generation == tree.generation:
+        index = tree_index(tree).position(value)
+        if index != -1:
+            cached.rename(index, value)
@@ -0,0 +1,224 @@
+import json
+import struct
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, TYPE_CHECKING
+import numpy as np
+from ..api.node import NODE_TYPE_INDEX, NODE_TYPE_TABLE
+from .deltas import key_delta, key_shapes_invalidate
+from .navigation import tree_index
+from .structure import tree_add_items
+if TYPE_CHECKING:
+    from bpy.types import Object
+    from ..api.node import ShapeTreeNode
+    from ..api.tree import ShapeTree
+
+# Layout: magic, version and header size, a JSON header, then 16 byte aligned
+# little-endian column blocks whose offsets the header gives relative to the
+# end of the header. Shape deltas form one (shapes, points, 3) float32 block
+# so that they can be memory-mapped when reading.
+SNAPSHOT_MAGIC = b"SHAPETRE"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_PREFIX = struct.Struct("<8sII")
+SNAPSHOT_ALIGN = 16
+
+DRIVER_WEIGHT = 1
+DRIVER_VALUE = 2
+
+
+def snapshot_align(size: int) -> int:
+    return -(-size // SNAPSHOT_ALIGN) * SNAPSHOT_ALIGN
+
+
+def snapshot_header(file: BinaryIO) -> Tuple[Dict[str, Any], int]:
+    magic, version, size = SNAPSHOT_PREFIX.unpack(file.read(SNAPSHOT_PREFIX.size))
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("Not a shape tree snapshot")
+    if version > SNAPSHOT_VERSION:
+        raise ValueError(f'Unsupported shape tree snapshot version {version}')
+    header = json.loads(file.read(size).decode("utf-8"))
+    return header, snapshot_align(SNAPSHOT_PREFIX.size + size)
+
+
+def snapshot_column(filepath: str, start: int, column: Dict[str, Any], mmap: bool=False) -> np.ndarray:
+    if mmap:
+        return np.memmap(filepath,
+                         dtype=column["dtype"],
+                         mode='r',
+                         offset=start + column["offset"],
+                         shape=tuple(column["shape"]))
+    with open(filepath, "rb") as file:
+        file.seek(start + column["offset"])
+        return np.fromfile(file, dtype=column["dtype"], count=int(np.prod(column["shape"]))).reshape(column["shape"])
+
+
+def tree_snapshot_write(tree: 'ShapeTree', filepath: str, include_deltas: bool=True) -> int:
+    key = tree.id_data
+    nodes = tree.collection__internal__
+    cache = tree_index(tree)
+    get = key.get
+
+    animdata = key.animation_data
+    paths = {fcurve.data_path for fcurve in animdata.drivers} if animdata else set()
+
+    # Node types owned by other add-ons can't be rebuilt, skip their subtrees
+    order = []
+    index = 0
+    while index < len(nodes):
+        if nodes[index].type in {'GROUP', 'SHAPEKEY'}:
+            order.append(index)
+            index += 1
+        else:
+            index = cache.subtree_end[index]
+
+    count = len(order)
+    types = np.empty(count, dtype="<u1")
+    depth = np.empty(count, dtype="<u2")
+    influence = np.empty(count, dtype="<f4")
+    weight = np.empty(count, dtype="<f4")
+    drivers = np.zeros(count, dtype="<u1")
+    names = []
+    shapes = []
+
+    for row, index in enumerate(order):
+        node = nodes[index]
+        name = node.name
+        names.append(name)
+        types[row] = node.get("type", 0)
+        depth[row] = cache.depth[index]
+        influence[row] = get(node.influence_property_name, 0.0)
+        weight[row] = get(node.weight_property_name, 0.0)
+        if node.weight_property_path in paths:
+            drivers[row] |= DRIVER_WEIGHT
+        if types[row] == NODE_TYPE_TABLE['SHAPEKEY']:
+            if f'key_blocks["{name}"].value' in paths:
+                drivers[row] |= DRIVER_VALUE
+            if include_deltas and name in key.key_blocks:
+                shapes.append(row)
+
+    columns = [("type", types), ("depth", depth), ("influence", influence), ("weight", weight), ("drivers", drivers)]
+    header = {
+        "names": names,
+        "driver_mode": tree.driver_mode,
+        "evaluation_mode": tree.evaluation_mode,
+        "columns": {},
+        }
+
+    offset = 0
+    for name, array in columns:
+        header["columns"][name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = snapshot_align(offset + array.nbytes)
+
+    points = len(key.reference_key.data) if shapes else 0
+    if shapes:
+        key_blocks = key.key_blocks
+        header["shapes"] = {
+            "nodes": shapes,
+            "relative_keys": [key_blocks[names[row]].relative_key.name for row in shapes],
+            "vertex_groups": [key_blocks[names[row]].vertex_group for row in shapes],
+            "deltas": {"dtype": "<f4", "shape": [len(shapes), points, 3], "offset": offset},
+            }
+
+    data = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    start = snapshot_align(SNAPSHOT_PREFIX.size + len(data))
+
+    with open(filepath, "wb") as file:
+        file.write(SNAPSHOT_PREFIX.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(data)))
+        file.write(data)
+        for name, array in columns:
+            file.seek(start + header["columns"][name]["offset"])
+            file.write(array.tobytes())
+
+        if shapes:
+            file.seek(start + header["shapes"]["deltas"]["offset"])
+            buffer = np.empty((points, 3), dtype="<f4")
+
+            # Written one shape at a time so the whole block is never in memory,
+            # scattering the cached sparse deltas into a zeroed buffer
+            for row in shapes:
+                delta = key_delta(key, names[row])
+                buffer.fill(0.0)
+                buffer[delta.indices] = delta.offsets
+                file.write(buffer.tobytes())
+
+    return count
+
+
+def tree_snapshot_read(tree: 'ShapeTree',
+                       filepath: str,
+                       parent: Optional['ShapeTreeNode']=None,
+                       object: Optional['Object']=None,
+                       apply_deltas: bool=True) -> List['ShapeTreeNode']:
+    key = tree.id_data
+
+    with open(filepath, "rb") as file:
+        header, start = snapshot_header(file)
+
+    columns = header["columns"]
+    types = snapshot_column(filepath, start, columns["type"])
+    depth = snapshot_column(filepath, start, columns["depth"])
+    influence = snapshot_column(filepath, start, columns["influence"])
+    weight = snapshot_column(filepath, start, columns["weight"])
+    drivers = snapshot_column(filepath, start, columns["drivers"])
+    names = header["names"]
+
+    shapes = header.get("shapes") if apply_deltas else None
+    deltas = None
+    if shapes is not None:
+        deltas = snapshot_column(filepath, start, shapes["deltas"], mmap=True)
+        if deltas.shape[1] != len(key.reference_key.data):
+            raise ValueError(f'Snapshot shapes have {deltas.shape[1]} points, '
+                             f'"{key.name}" has {len(key.reference_key.data)}')
+
+    # The modes of the snapshot only apply to a tree it builds from scratch
+    empty = not len(tree.collection__internal__)
+    if empty:
+        tree.driver_mode = header.get("driver_mode", 'CHAINED')
+
+    items = [(NODE_TYPE_INDEX[type], name, int(level)) for type, name, level in zip(types, names, depth)]
+    nodes = tree_add_items(tree, items, parent, object)
+
+    animdata = key.animation_data
+    fcurves = {fcurve.data_path: fcurve for fcurve in animdata.drivers} if animdata else {}
+
+    # Nodes are created with drivers, only those the snapshot didn't have are
+    # removed. Weights that weren't driven keep their stored value.
+    for node, value, result, flags in zip(nodes, influence, weight, drivers):
+        key[node.influence_property_name] = float(value)
+        if not flags & DRIVER_WEIGHT:
+            fcurve = fcurves.get(node.weight_property_path)
+            if fcurve is not None:
+                animdata.drivers.remove(fcurve)
+            key[node.weight_property_name] = float(result)
+        if node.type == 'SHAPEKEY' and not flags & DRIVER_VALUE:
+            fcurve = fcurves.get(f'key_blocks["{node.name}"].value')
+            if fcurve is not None:
+                animdata.drivers.remove(fcurve)
+
+    if deltas is not None:
+        key_blocks = key.key_blocks
+        points = deltas.shape[1]
+        basis: Dict[str, np.ndarray] = {}
+
+        for row, relative, group, delta in zip(shapes["nodes"],
+                                              shapes["relative_keys"],
+                                              shapes["vertex_groups"],
+                                              deltas):
+            shape = key_blocks.get(nodes[row].name)
+            if shape is None:
+                continue
+            reference = key_blocks.get(relative) or key.reference_key
+            if reference.name not in basis:
+                basis[reference.name] = np.empty(points * 3, dtype=np.float32)
+                reference.data.foreach_get("co", basis[reference.name])
+            shape.data.foreach_set("co", basis[reference.name] + delta.reshape(-1))
+            shape.relative_key = reference
+            shape.vertex_group = group
+            key_shapes_invalidate(key, (shape.name,))
+
+    # Set once every driver exists, so that the mode mutes them and the
+    # evaluator writes the restored weights
+    if empty:
+        mode = header.get("evaluation_mode", 'DRIVERS')
+        if tree.evaluation_mode != mode:
+            tree.evaluation_mode = mode
+
+    return nodes
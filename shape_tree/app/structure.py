@@ -0,0 +1,376 @@
+from typing import Any, List, Optional, Tuple, TYPE_CHECKING
+from ..api.node import (NODE_TYPE_CHILD,
+                        NODE_TYPE_DATA,
+                        NODE_TYPE_TABLE,
+                        NODE_TYPE_VALID,
+                        node_depth,
+                        node_is_generated)
+from .drivers import driver_batch, node_drivers_create, node_weight_driver_update
+from .events import event_node_add, event_node_move, event_node_remove
+from .model import block_move
+from .names import tree_names, tree_names_sync
+from .navigation import tree_index, tree_invalidate
+if TYPE_CHECKING:
+    from bpy.types import Object
+    from ..api.node import ShapeTreeNode
+    from ..api.tree import ShapeTree
+
+NODE_SPEC_DRIVEN = {'GROUP', 'SHAPEKEY'}
+
+
+def node_insert(tree: 'ShapeTree',
+                type: str,
+                name: str,
+                parent: Optional['ShapeTreeNode']=None) -> 'ShapeTreeNode':
+    nodes = tree.collection__internal__
+
+    cache = tree_index(tree)
+    if parent is None:
+        owner = -1
+        depth = 0
+    else:
+        owner = cache.position(parent.name)
+        depth = parent.get("depth", 0) + 1
+        parent["length"] = parent.get("length", 0) + 1
+
+    names = tree_names(tree)
+
+    node = nodes.add()
+    node["type"] = NODE_TYPE_TABLE[type]
+    node["name"] = name
+    node["depth"] = depth
+    node["length"] = 0
+
+    # Indices come from the tree index, nodes after the insert aren't touched
+    # and the index itself is updated rather than rebuilt from every node
+    index = cache.insert(name, owner)
+    count = len(nodes)
+    block_move(nodes, count - 1, count, index)
+
+    names.add(name)
+    tree_names_sync(tree)
+    tree_invalidate(tree, cache)
+    event_node_add(tree, (name,))
+    return nodes[index]
+
+
+def length_update(nodes, index: int, delta: int) -> None:
+    if index != -1:
+        node = nodes[index]
+        node["length"] = node.get("length", 0) + delta
+
+
+def node_move(tree: 'ShapeTree', node: 'ShapeTreeNode', direction: str) -> 'ShapeTreeNode':
+    nodes = tree.collection__internal__
+    cache = tree_index(tree)
+    start = cache.position(node.name)
+    end = cache.subtree_end[start]
+
+    if direction == 'UP':
+        other = cache.previous_sibling[start]
+        if other == -1:
+            return node
+        target = other
+    else:
+        other = cache.next_sibling[start]
+        if other == -1:
+            return node
+        target = cache.subtree_end[other]
+
+    moves = ((cache.names[start], start), (cache.names[other], other))
+    index = block_move(nodes, start, end, target)
+    cache.move(start, end, target)
+
+    tree_invalidate(tree, cache)
+    event_node_move(tree, moves)
+    return nodes[index]
+
+
+def node_remove(tree: 'ShapeTree',
+                node: 'ShapeTreeNode',
+                object: Optional['Object']=None) -> None:
+    key = tree.id_data
+    nodes = tree.collection__internal__
+    cache = tree_index(tree)
+    start = cache.position(node.name)
+    end = cache.subtree_end[start]
+
+    animdata = key.animation_data
+    fcurves = {fcurve.data_path: fcurve for fcurve in animdata.drivers} if animdata else {}
+    shapes = []
+    sources = set()
+
+    for item in nodes[start:end]:
+        type = item.type
+        if type not in {'GROUP', 'SHAPEKEY'}:
+            # Generated nodes only have the value driver of their shape, the
+            # drivers of add-on owned nodes belong to the add-on.
+            if node_is_generated(item):
+                fcurve = fcurves.get(f'key_blocks["{item.name}"].value')
+                if fcurve is not None:
+                    animdata.drivers.remove(fcurve)
+                if "source" in item:
+                    sources.add(item["source"])
+                shapes.append(item.name)
+            continue
+
+        paths = [item.weight_property_path]
+        if type == 'SHAPEKEY':
+            fcurve = fcurves.get(f'key_blocks["{item.name}"].value')
+            if fcurve is not None:
+                variables = fcurve.driver.variables
+                if (len(variables) == 1
+                        and variables[0].targets[0].data_path == item.weight_property_path):
+                    paths.append(fcurve.data_path)
+            shapes.append(item.name)
+
+        for path in paths:
+            fcurve = fcurves.get(path)
+            if fcurve is not None:
+                animdata.drivers.remove(fcurve)
+
+        key.pop(item.influence_property_name, None)
+        key.pop(item.weight_property_name, None)
+
+    length_update(nodes, cache.parent[start], -1)
+
+    for index in reversed(range(start, end)):
+        nodes.remove(index)
+
+    removed = cache.names[start:end]
+    cache.remove(start)
+    tree_invalidate(tree, cache)
+    event_node_remove(tree, removed)
+
+    # Split shapes are muted while any of their XYZ components remain
+    if sources:
+        sources.difference_update(item.get("source") for item in nodes if item.type == 'XYZ')
+        key_blocks = key.key_blocks
+        for name in sources:
+            shape = key_blocks.get(name)
+            if shape is not None:
+                shape.mute = False
+
+    if object is not None:
+        key_blocks = key.key_blocks
+        for name in shapes:
+            shape = key_blocks.get(name)
+            if shape is not None:
+                object.shape_key_remove(shape)
+
+
+def node_reparent(tree: 'ShapeTree',
+                  node: 'ShapeTreeNode',
+                  parent: Optional['ShapeTreeNode']=None) -> 'ShapeTreeNode':
+    nodes = tree.collection__internal__
+    cache = tree_index(tree)
+    start = cache.position(node.name)
+    end = cache.subtree_end[start]
+    previous = cache.parent[start]
+
+    if parent is None:
+        # The root of the tree takes the same node types as a group
+        if node.type not in NODE_TYPE_CHILD['GROUP']:
+            raise ValueError(f'Node "{node.name}" cannot be a root node')
+        owner = -1
+        depth = 0
+        target = len(nodes)
+    else:
+        owner = cache.position(parent.name)
+        if owner == start or cache.is_ancestor_of(start, owner):
+            raise ValueError(f'Node "{node.name}" cannot be moved into its own subtree')
+        if node.type not in NODE_TYPE_CHILD[parent.type]:
+            raise ValueError(f'Node "{node.name}" cannot be a child of a {parent.type} node')
+        depth = node_depth(parent) + 1
+        target = cache.subtree_end[owner]
+
+    if owner == previous:
+        return node
+
+    length_update(nodes, previous, -1)
+    length_update(nodes, owner, 1)
+
+    delta = depth - node_depth(node)
+    if delta:
+        for item in nodes[start:end]:
+            item["depth"] = node_depth(item) + delta
+
+    moves = ((cache.names[start], start),)
+    index = block_move(nodes, start, end, target)
+    cache.move(start, end, target, delta)
+
+    tree_invalidate(tree, cache)
+    event_node_move(tree, moves)
+
+    # Only the moved node's parent changed, unless weights read every ancestor
+    if tree.driver_mode == 'FLAT':
+        with driver_batch(tree.id_data):
+            for item in nodes[index:index + end - start]:
+                if item.type in {'GROUP', 'SHAPEKEY'}:
+                    node_weight_driver_update(item)
+    elif nodes[index].type in {'GROUP', 'SHAPEKEY'}:
+        node_weight_driver_update(nodes[index])
+
+    return nodes[index]
+
+
+def tree_update_lengths(tree: 'ShapeTree') -> None:
+    nodes = tree.collection__internal__
+    cache = tree_index(tree)
+    first_child = cache.first_child
+    for index, node in enumerate(nodes):
+        node["length"] = cache.length(index) if first_child[index] != -1 else 0
+
+
+def node_spec_flatten(spec: Any,
+                      depth: int=0,
+                      result: Optional[List[Tuple[str, str, int]]]=None) -> List[Tuple[str, str, int]]:
+    # Accepts a shape key name, a list of specs, a {"name", "type", "children"}
+    # dict or a {name: children} mapping where None children denote a shape key.
+    if result is None:
+        result = []
+
+    if isinstance(spec, str):
+        result.append(('SHAPEKEY', spec, depth))
+
+    elif isinstance(spec, dict):
+        if "name" in spec:
+            children = spec.get("children")
+            type = spec.get("type", 'SHAPEKEY' if children is None else 'GROUP')
+            result.append((type, spec["name"], depth))
+            if children is not None:
+                node_spec_flatten(children, depth + 1, result)
+        else:
+            for name, children in spec.items():
+                if children is None:
+                    result.append(('SHAPEKEY', name, depth))
+                else:
+                    result.append(('GROUP', name, depth))
+                    node_spec_flatten(children, depth + 1, result)
+
+    elif isinstance(spec, (list, tuple)):
+        for item in spec:
+            node_spec_flatten(item, depth, result)
+
+    else:
+        raise TypeError(f'Invalid shape tree node spec {spec!r}')
+
+    return result
+
+
+def tree_add_nodes(tree: 'ShapeTree',
+                   spec: Any,
+                   parent: Optional['ShapeTreeNode']=None,
+                   object: Optional['Object']=None) -> List['ShapeTreeNode']:
+    return tree_add_items(tree, node_spec_flatten(spec), parent, object)
+
+
+def tree_items_validate(tree: 'ShapeTree',
+                        items: List[Tuple[str, str, int]],
+                        parent: Optional['ShapeTreeNode']=None,
+                        object: Optional['Object']=None) -> None:
+    # Raises ValueError if tree_add_items would reject the items, without
+    # changing anything.
+    key = tree.id_data
+    nodes = tree.collection__internal__
+
+    if parent is not None and not NODE_TYPE_CHILD[parent.type]:
+        raise ValueError(f'Parent node "{parent.name}" cannot have children')
+
+    types = []
+    for type, name, depth in items:
+        if type not in NODE_TYPE_TABLE or not NODE_TYPE_VALID[type](key):
+            raise ValueError(f'Unsupported node type "{type}" for "{name}"')
+        if depth > len(types):
+            raise ValueError(f'Node "{name}" has no parent at depth {depth-1}')
+        if depth > 0:
+            owner = types[depth-1]
+        else:
+            # The root of the tree takes the same node types as a group
+            owner = parent.type if parent is not None else 'GROUP'
+        if type not in NODE_TYPE_CHILD[owner]:
+            raise ValueError(f'Node "{name}" cannot be a child of a {owner} node')
+        del types[depth:]
+        types.append(type)
+
+    key_blocks = key.key_blocks
+    added = set()
+
+    for type, name, _ in items:
+        if type != 'GROUP':
+            if name in nodes or name in added:
+                raise ValueError(f'Shape key "{name}" is already in the shape tree')
+            if name not in key_blocks and object is None:
+                raise ValueError(f'Shape key "{name}" not found')
+            added.add(name)
+
+
+def tree_add_items(tree: 'ShapeTree',
+                   items: List[Tuple[str, str, int]],
+                   parent: Optional['ShapeTreeNode']=None,
+                   object: Optional['Object']=None) -> List['ShapeTreeNode']:
+    # Adds (type, name, depth) items given in depth-first order, with depths
+    # relative to the parent. Nodes of types owned by other add-ons point at
+    # the entry of the same name in the add-on's collection.
+    key = tree.id_data
+    nodes = tree.collection__internal__
+
+    if not items:
+        return []
+
+    tree_items_validate(tree, items, parent, object)
+
+    cache = tree_index(tree)
+    if parent is not None:
+        offset = node_depth(parent) + 1
+        index = cache.insert_position(cache.position(parent.name))
+    else:
+        offset = 0
+        index = cache.insert_position(-1)
+
+    # Only touch the shared registry once every item is known to be valid
+    names = tree_names(tree)
+
+    # Shape names are fixed, so reserve them all before groups are given
+    # unique names, or a group could take the name of a later shape.
+    for type, name, _ in items:
+        if type != 'GROUP':
+            names.add(name)
+
+    resolved = []
+    for type, name, _ in items:
+        if type == 'GROUP':
+            name = names.unique(name)
+            names.add(name)
+        resolved.append(name)
+
+    key_blocks = key.key_blocks
+    start = len(nodes)
+
+    for (type, _, depth), name in zip(items, resolved):
+        if type != 'GROUP' and name not in key_blocks:
+            object.shape_key_add(name=name, from_mix=False)
+            names.add(name)
+
+        node = nodes.add()
+        node["type"] = NODE_TYPE_TABLE[type]
+        node["name"] = name
+        node["depth"] = depth + offset
+        if type in NODE_TYPE_DATA:
+            node["data_path"] = f'{NODE_TYPE_DATA[type]}["{name}"]'
+
+    count = len(items)
+    block_move(nodes, start, len(nodes), index)
+
+    tree_names_sync(tree)
+    tree_invalidate(tree)
+    tree_update_lengths(tree)
+
+    # Drivers of other node types belong to the add-ons that own them
+    with driver_batch(tree.id_data):
+        for position in range(index, index + count):
+            if items[position - index][0] in NODE_SPEC_DRIVEN:
+                node_drivers_create(nodes[position])
+
+    event_node_add(tree, resolved)
+    return nodes[index:index + count]
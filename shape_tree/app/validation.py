@@ -0,0 +1,278 @@
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple, TYPE_CHECKING
+from ..api.node import node_is_generated
+from .model import ShapeTreeModel
+from .navigation import tree_index
+if TYPE_CHECKING:
+    from bpy.types import Key
+    from ..api.node import ShapeTreeNode
+    from ..api.tree import ShapeTree
+
+VALIDATION_CHUNK_SIZE = 200
+VALIDATION_INTERVAL = 0.1
+
+_states: Dict[int, 'ShapeTreeValidation'] = {}
+
+
+class ShapeTreeIssue(NamedTuple):
+    node: str
+    code: str
+    severity: str
+    message: str
+
+
+class ShapeTreeValidation:
+    # Cached issues for the nodes of one tree. A pass walks the nodes a chunk
+    # at a time from a timer so that large trees never block the UI. Later
+    # changes to the key only revalidate the nodes that own what changed.
+
+    __slots__ = ("generation", "signature", "drivers", "blocks", "props", "owners", "results", "pending", "dirty")
+
+    def __init__(self, generation: int) -> None:
+        self.generation = generation
+        self.signature: Optional[Tuple[Tuple[str, ...], int, Tuple[bool, ...]]] = None
+        self.drivers: Optional[Dict[str, Tuple[bool, bool, str]]] = None
+        self.blocks: Set[str] = set()
+        self.props: Set[str] = set()
+        self.owners: Dict[str, str] = {}
+        self.results: Dict[str, Tuple[ShapeTreeIssue, ...]] = {}
+        self.pending: Optional[int] = None
+        self.dirty: Set[str] = set()
+
+
+def key_signature(key: 'Key') -> Tuple[Tuple[str, ...], int, Tuple[bool, ...]]:
+    # Cheap enough to check on every depsgraph update, value changes during
+    # playback leave it as it is. Shape key names catch renames made outside
+    # of the tree and the F-Curve flags catch drivers that stop evaluating.
+    animdata = key.animation_data
+    flags = []
+    if animdata is not None:
+        drivers = animdata.drivers
+        flags = [False] * len(drivers)
+        drivers.foreach_get("is_valid", flags)
+    return (tuple(key.key_blocks.keys()), len(key.keys()), tuple(flags))
+
+
+def driver_table(key: 'Key') -> Dict[str, Tuple[bool, bool, str]]:
+    # Maps driver data paths to (valid, is asks driver, first target path)
+    from .drivers import is_asks_driver
+    table = {}
+    animdata = key.animation_data
+    if animdata is not None:
+        for fcurve in animdata.drivers:
+            driver = fcurve.driver
+            variables = driver.variables
+            target = variables[0].targets[0].data_path if len(variables) else ""
+            table[fcurve.data_path] = (fcurve.is_valid and driver.is_valid, is_asks_driver(fcurve), target)
+    return table
+
+
+def node_validate(node: 'ShapeTreeNode',
+                  index: int,
+                  cache: ShapeTreeModel,
+                  drivers: Dict[str, Tuple[bool, bool, str]]) -> Tuple[ShapeTreeIssue, ...]:
+    key = node.id_data
+    name = node.name
+    type = node.type
+    issues = []
+
+    def issue(code: str, message: str, severity: str='ERROR') -> None:
+        issues.append(ShapeTreeIssue(name, code, severity, message))
+
+    parent = cache.parent[index]
+    depth = node.depth
+    if depth != (0 if parent == -1 else cache.depth[parent] + 1):
+        issue('DEPTH', f'Depth {depth} is not one more than the depth of its parent')
+
+    length = cache.length(index)
+    if len(node) != length:
+        issue('LENGTH', f'Stored length {len(node)} does not match {length} children')
+
+    if node.is_shape and name not in key.key_blocks:
+        issue('ORPHANED_SHAPE', f'Shape key "{name}" not found')
+
+    if type not in {'GROUP', 'SHAPEKEY'}:
+        # Generated nodes have no add-on entry, the tree drives their value
+        if node_is_generated(node):
+            entry = drivers.get(f'key_blocks["{name}"].value')
+            if entry is None:
+                issue('DANGLING_DATA_PATH', f'Data path "{node.data_path}" does not resolve')
+            elif not entry[0]:
+                issue('DRIVER_BROKEN', "Shape key value driver is invalid")
+        return tuple(issues)
+
+    for prop in (node.influence_property_name, node.weight_property_name):
+        if prop not in key:
+            issue('MISSING_IDPROP', f'Property "{prop}" not found')
+
+    entry = drivers.get(node.weight_property_path)
+    if entry is None:
+        issue('DRIVER_MISSING', "Weight driver not found")
+    elif not entry[0]:
+        issue('DRIVER_BROKEN', "Weight driver is invalid")
+
+    if type == 'SHAPEKEY':
+        entry = drivers.get(f'key_blocks["{name}"].value')
+        if entry is not None:
+            if not entry[0]:
+                issue('DRIVER_BROKEN', "Shape key value driver is invalid")
+            elif not entry[1] and entry[2] != node.weight_property_path:
+                issue('DRIVER_FOREIGN', "Shape key value is driven by something other than the tree", 'WARNING')
+
+    return tuple(issues)
+
+
+def tree_validation(tree: 'ShapeTree') -> ShapeTreeValidation:
+    pointer = tree.id_data.as_pointer()
+    state = _states.get(pointer)
+    if state is None or state.generation != tree.generation:
+        state = _states[pointer] = ShapeTreeValidation(tree.generation)
+    return state
+
+
+def tree_validation_sync(state: ShapeTreeValidation, key: 'Key') -> Dict[str, Tuple[bool, bool, str]]:
+    # Records what the cached results were validated against
+    state.signature = key_signature(key)
+    state.drivers = driver_table(key)
+    state.blocks = set(key.key_blocks.keys())
+    state.props = set(key.keys())
+    return state.drivers
+
+
+def state_node_validate(state: ShapeTreeValidation,
+                        node: 'ShapeTreeNode',
+                        index: int,
+                        cache: ShapeTreeModel) -> Tuple[ShapeTreeIssue, ...]:
+    name = node.name
+    owners = state.owners
+    owners[name] = name
+    owners[f'key_blocks["{name}"].value'] = name
+    for prop in (node.influence_property_name, node.weight_property_name, node.weight_property_path):
+        if prop is not None:
+            owners[prop] = name
+    result = state.results[name] = node_validate(node, index, cache, state.drivers)
+    return result
+
+
+def node_issues(node: 'ShapeTreeNode') -> Tuple[ShapeTreeIssue, ...]:
+    tree = node.id_data.shape_tree
+    state = tree_validation(tree)
+    name = node.name
+    try:
+        return state.results[name]
+    except KeyError: pass
+
+    if state.drivers is None:
+        tree_validation_sync(state, tree.id_data)
+
+    cache = tree_index(tree)
+    return state_node_validate(state, node, cache.position(name), cache)
+
+
+def tree_validate(tree: 'ShapeTree') -> List[ShapeTreeIssue]:
+    # Full synchronous scan, which also replaces the cached results
+    state = tree_validation(tree)
+    tree_validation_sync(state, tree.id_data)
+    state.owners.clear()
+    state.results.clear()
+    state.pending = None
+    state.dirty.clear()
+
+    cache = tree_index(tree)
+    result = []
+    for index, node in enumerate(tree.collection__internal__):
+        result.extend(state_node_validate(state, node, index, cache))
+    return result
+
+
+def tree_validate_step(tree: 'ShapeTree', count: int=VALIDATION_CHUNK_SIZE) -> bool:
+    # Validates the next chunk of a pending pass, or the nodes marked dirty
+    # since, and returns True if the tree still has work left.
+    state = tree_validation(tree)
+    nodes = tree.collection__internal__
+    cache = tree_index(tree)
+
+    if state.pending is not None:
+        start = state.pending
+        end = min(start + count, len(nodes))
+        for index in range(start, end):
+            state_node_validate(state, nodes[index], index, cache)
+        state.pending = end if end < len(nodes) else None
+        return True
+
+    dirty = state.dirty
+    while dirty and count > 0:
+        index = cache.lookup.get(dirty.pop(), -1)
+        if index != -1:
+            state_node_validate(state, nodes[index], index, cache)
+            count -= 1
+    return bool(dirty)
+
+
+def tree_validation_diff(state: ShapeTreeValidation, key: 'Key') -> None:
+    # Marks the nodes owning the drivers, shape keys and properties that
+    # changed since the last sync
+    drivers = state.drivers
+    blocks = state.blocks
+    props = state.props
+    current = tree_validation_sync(state, key)
+
+    changed = {path for path in drivers.keys() | current.keys() if drivers.get(path) != current.get(path)}
+    changed.update(blocks ^ state.blocks)
+    changed.update(props ^ state.props)
+
+    owners = state.owners
+    for item in changed:
+        name = owners.get(item)
+        if name is not None:
+            state.results.pop(name, None)
+            state.dirty.add(name)
+
+
+def tree_validation_schedule(tree: 'ShapeTree') -> bool:
+    # Returns True if the tree has nodes waiting to be validated
+    key = tree.id_data
+    state = tree_validation(tree)
+
+    if state.drivers is None:
+        # Nothing validated since the structure last changed
+        tree_validation_sync(state, key)
+        state.pending = 0
+        return True
+
+    if key_signature(key) != state.signature:
+        tree_validation_diff(state, key)
+
+    return state.pending is not None or bool(state.dirty)
+
+
+def validation_clear() -> None:
+    _states.clear()
+
+
+def validation_timer() -> Optional[float]:
+    from bpy import data
+    busy = False
+    for key in data.shape_keys:
+        if key.library is None and key.as_pointer() in _states:
+            busy = tree_validate_step(key.shape_tree) or busy
+    return VALIDATION_INTERVAL if busy else None
+
+
+def validation_schedule(keys) -> None:
+    from bpy.app import timers
+    busy = False
+    for key in keys:
+        if key.library is None and len(key.shape_tree.collection__internal__):
+            busy = tree_validation_schedule(key.shape_tree) or busy
+    if busy and not timers.is_registered(validation_timer):
+        timers.register(validation_timer, first_interval=VALIDATION_INTERVAL)
+
+
+def data_validate() -> Dict[str, List[Dict[str, str]]]:
+    # Full scan of every local shape tree in the file, for batch validation
+    from bpy import data
+    report = {}
+    for key in data.shape_keys:
+        if key.library is None and len(key.shape_tree.collection__internal__):
+            report[key.name] = [issue._asdict() for issue in tree_validate(key.shape_tree)]
+    return report
@@ -0,0 +1,53 @@
+from typing import Dict, FrozenSet, List, Optional, Tuple, TYPE_CHECKING
+from .navigation import tree_index
+from .search import tree_search
+if TYPE_CHECKING:
+    from ..api.node import ShapeTreeNode
+    from ..api.tree import ShapeTree
+
+_cache: Dict[int, Tuple[tuple, List[int]]] = {}
+_versions: Dict[int, int] = {}
+
+
+def node_show_expanded_update(node: 'ShapeTreeNode', _) -> None:
+    tree_visibility_invalidate(node.id_data.shape_tree)
+
+
+def tree_visibility(tree: 'ShapeTree',
+                    flag: int,
+                    pattern: str="",
+                    types: Optional[FrozenSet[int]]=None,
+                    invert: bool=False) -> List[int]:
+    pointer = tree.id_data.as_pointer()
+    nodes = tree.collection__internal__
+    filtered = bool(pattern) or types is not None
+    search = tree_search(tree) if filtered else None
+    signature = (tree.generation,
+                 _versions.get(pointer, 0),
+                 len(nodes),
+                 flag,
+                 invert,
+                 (pattern, types, search.version) if filtered else None)
+
+    cached = _cache.get(pointer)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    model = tree_index(tree)
+    flags = model.visibility(flag,
+                             lambda index: nodes[index].show_expanded,
+                             search.match(model, pattern, types, invert) if filtered else None,
+                             invert)
+
+    _cache[pointer] = (signature, flags)
+    return flags
+
+
+def tree_visibility_clear() -> None:
+    _cache.clear()
+    _versions.clear()
+
+
+def tree_visibility_invalidate(tree: 'ShapeTree') -> None:
+    pointer = tree.id_data.as_pointer()
+    _versions[pointer] = _versions.get(pointer, 0) + 1
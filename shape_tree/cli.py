@@ -0,0 +1,191 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Batch validate, bake or export the shape trees of many .blend files:
+#
+#   blender -b --python shape_tree/cli.py -- --job validate --output report.json *.blend
+#
+# The first Blender only coordinates. Each file is handled by a background
+# Blender worker running this same script with --worker, up to --jobs at a
+# time, and their results are gathered into one JSON report.
+
+
+def job_validate(_: argparse.Namespace) -> Dict[str, Any]:
+    from .app.validation import data_validate
+    return data_validate()
+
+
+def job_bake(options: argparse.Namespace) -> Dict[str, Any]:
+    from bpy import context, data, ops
+    from .app.bake import tree_bake
+
+    scene = context.scene
+    start = scene.frame_start if options.frame_start is None else options.frame_start
+    end = scene.frame_end if options.frame_end is None else options.frame_end
+    report = {}
+
+    for key in data.shape_keys:
+        if key.library is None and len(key.shape_tree.collection__internal__):
+            report[key.name] = tree_bake(key.shape_tree, start, end, reduce=options.reduce)._asdict()
+
+    if options.save and report:
+        ops.wm.save_mainfile()
+    return report
+
+
+def job_export(options: argparse.Namespace) -> Dict[str, Any]:
+    from bpy import data
+    from bpy.path import clean_name
+    from .app.snapshot import tree_snapshot_write
+
+    name = os.path.splitext(os.path.basename(data.filepath))[0]
+    directory = options.directory or os.path.dirname(data.filepath)
+    report = {}
+
+    for key in data.shape_keys:
+        if key.library is None and len(key.shape_tree.collection__internal__):
+            filepath = os.path.join(directory, f'{name}_{clean_name(key.name)}.shtree')
+            report[key.name] = {"filepath": filepath, "nodes": tree_snapshot_write(key.shape_tree, filepath)}
+    return report
+
+
+JOBS: Dict[str, Callable[[argparse.Namespace], Dict[str, Any]]] = {
+    "validate": job_validate,
+    "bake": job_bake,
+    "export": job_export,
+    }
+
+
+def arguments(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="shape_tree.cli", description="Batch shape tree jobs over .blend files")
+    parser.add_argument("files", nargs="*", help=".blend files to process")
+    parser.add_argument("--job", choices=sorted(JOBS), required=True)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Number of Blender workers")
+    parser.add_argument("--output", help="JSON report path, printed if omitted")
+    parser.add_argument("--blender", help="Blender executable for the workers")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds allowed per file")
+    parser.add_argument("--directory", help="Export: directory for snapshot files")
+    parser.add_argument("--save", action="store_true", help="Bake: save each file after baking")
+    parser.add_argument("--reduce", action="store_true", help="Bake: remove redundant keyframes")
+    parser.add_argument("--frame-start", type=int, default=None)
+    parser.add_argument("--frame-end", type=int, default=None)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def worker_arguments(options: argparse.Namespace, output: str) -> List[str]:
+    result = ["--worker", "--job", options.job, "--output", output]
+    if options.directory:
+        result.extend(("--directory", os.path.abspath(options.directory)))
+    if options.save:
+        result.append("--save")
+    if options.reduce:
+        result.append("--reduce")
+    if options.frame_start is not None:
+        result.extend(("--frame-start", str(options.frame_start)))
+    if options.frame_end is not None:
+        result.extend(("--frame-end", str(options.frame_end)))
+    return result
+
+
+def worker_run(options: argparse.Namespace, blender: str, filepath: str) -> Dict[str, Any]:
+    handle, output = tempfile.mkstemp(suffix=".json")
+    os.close(handle)
+    command = [blender, "-b", filepath,
+               "--python-exit-code", "1",
+               "--python", os.path.abspath(__file__),
+               "--", *worker_arguments(options, output)]
+    start = time.perf_counter()
+    try:
+        try:
+            process = subprocess.run(command, capture_output=True, text=True, timeout=options.timeout)
+        except subprocess.TimeoutExpired:
+            return {"status": "timeout", "elapsed": time.perf_counter() - start}
+        elapsed = time.perf_counter() - start
+
+        try:
+            with open(output, encoding="utf-8") as file:
+                result = json.load(file)
+        except (OSError, ValueError):
+            result = {"status": "error", "error": process.stderr[-4000:] or process.stdout[-4000:]}
+    finally:
+        # The worker may still have written the file before timing out
+        try:
+            os.remove(output)
+        except OSError: pass
+
+    result["returncode"] = process.returncode
+    result["elapsed"] = elapsed
+    return result
+
+
+def worker(options: argparse.Namespace) -> int:
+    # Runs inside the background Blender that has the file open
+    from bpy.types import Key
+    if not hasattr(Key, "shape_tree"):
+        from . import register
+        register()
+
+    try:
+        result = {"status": "ok", "result": JOBS[options.job](options)}
+    except Exception as error:
+        result = {"status": "error", "error": f'{type(error).__name__}: {error}'}
+
+    with open(options.output, "w", encoding="utf-8") as file:
+        json.dump(result, file)
+    return 0 if result["status"] == "ok" else 1
+
+
+def coordinator(options: argparse.Namespace) -> int:
+    blender = options.blender
+    if blender is None:
+        try:
+            from bpy.app import binary_path as blender
+        except ImportError:
+            blender = "blender"
+
+    files = [os.path.abspath(filepath) for filepath in options.files]
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max(1, options.jobs)) as pool:
+        results = list(pool.map(lambda filepath: worker_run(options, blender, filepath), files))
+
+    report = {
+        "job": options.job,
+        "elapsed": time.perf_counter() - start,
+        "files": dict(zip(files, results)),
+        }
+
+    text = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as file:
+            file.write(text)
+    else:
+        print(text)
+
+    return 0 if all(result.get("status") == "ok" for result in results) else 1
+
+
+def main(argv: Optional[Sequence[str]]=None) -> int:
+    if argv is None:
+        # Blender's own arguments come before "--"
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    options = arguments(argv)
+    return worker(options) if options.worker else coordinator(options)
+
+
+if __name__ == "__main__":
+    # Run as a script by blender --python, import this module from its package
+    import importlib
+    directory = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.dirname(directory))
+    code = importlib.import_module(f'{os.path.basename(directory)}.cli').main()
+    if code:
+        sys.exit(code)
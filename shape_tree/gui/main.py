@@ -3,6 +3,8 @@ from typing import TYPE_CHECKING
 from bpy.types import Panel
 from ..lib.asks import COMPAT_ENGINES, COMPAT_OBJECTS, split_layout
 from ..ops.add import SHAPETREE_OT_node_add
+from ..ops.move import SHAPETREE_OT_node_move
+from ..ops.remove import SHAPETREE_OT_node_remove
 from .tree import SHAPETREE_UL_tree
 if TYPE_CHECKING:
     from bpy.types import Context
@@ -38,23 +40,34 @@ class SHAPETREE_PT_main(Panel):
 
         col = row.column(align=True)
         col.operator(SHAPETREE_OT_node_add.bl_idname, text="", icon='ADD')
+        col.operator(SHAPETREE_OT_node_remove.bl_idname, text="", icon='REMOVE')
+        col.separator()
+        col.operator(SHAPETREE_OT_node_move.bl_idname, text="", icon='TRIA_UP').direction = 'UP'
+        col.operator(SHAPETREE_OT_node_move.bl_idname, text="", icon='TRIA_DOWN').direction = 'DOWN'
+
+        col = split_layout(layout, "Evaluation", padding=True)
+        col.prop(tree, "evaluation_mode", text="")
+
+        col = split_layout(layout, "Drivers", padding=True)
+        col.prop(tree, "driver_mode", text="")
 
         node = tree.active
         if node is not None:
-            data = node.data
+            from ..app.resolve import node_resolve, node_resolve_shape
+            info = node_resolve(node)
 
-            if data is None:
+            if info.influence_property_path is None:
                 # TODO
                 return
 
             col = split_layout(layout, "Influence", padding=True)
-            col.prop(key, data.influence_property_path, text="", slider=True)
+            col.prop(key, info.influence_property_path, text="", slider=True)
 
             col = split_layout(layout, "Weight", padding=True)
-            col.prop(key, data.weight_property_path, text="", slider=True)
+            col.prop(key, info.weight_property_path, text="", slider=True)
 
             if node.is_shape:
-                shape = node.shape
+                shape = node_resolve_shape(node)
                 if shape is None:
                     # TODO
                     return
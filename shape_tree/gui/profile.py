@@ -0,0 +1,56 @@
+from typing import TYPE_CHECKING
+from bpy.types import Panel
+from ..lib.asks import COMPAT_ENGINES, COMPAT_OBJECTS
+from ..app.profiling import profile_enabled, profile_report
+from ..ops.profile import SHAPETREE_OT_profile_report, SHAPETREE_OT_profile_toggle
+if TYPE_CHECKING:
+    from bpy.types import Context
+
+PROFILE_PANEL_ROWS = 8
+
+
+class SHAPETREE_PT_profile(Panel):
+
+    bl_space_type = 'PROPERTIES'
+    bl_region_type = 'WINDOW'
+    bl_context = 'data'
+    bl_label = "Profiling"
+    bl_description = "Time spent in instrumented shape tree functions"
+    bl_parent_id = "SHAPETREE_PT_main"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    @classmethod
+    def poll(cls, context: 'Context') -> bool:
+        if context.preferences.view.show_developer_ui and context.engine in COMPAT_ENGINES:
+            object = context.object
+            return object is not None and object.type in COMPAT_OBJECTS
+        return False
+
+    def draw(self, _: 'Context') -> None:
+        layout = self.layout
+        enabled = profile_enabled()
+
+        row = layout.row(align=True)
+        row.operator(SHAPETREE_OT_profile_toggle.bl_idname,
+                     text="Stop" if enabled else "Start",
+                     icon='PAUSE' if enabled else 'REC',
+                     depress=enabled)
+        if not enabled:
+            row.operator(SHAPETREE_OT_profile_toggle.bl_idname, text="", icon='RNA').rna = True
+        row.operator(SHAPETREE_OT_profile_report.bl_idname, text="Report", icon='TEXT')
+        row.operator(SHAPETREE_OT_profile_report.bl_idname, text="", icon='X').clear = True
+
+        report = profile_report(PROFILE_PANEL_ROWS)
+        if not report:
+            layout.label(text="Nothing recorded")
+            return
+
+        col = layout.column(align=True)
+        for name, stat in report:
+            split = col.split(factor=0.55)
+            split.label(text=name)
+            row = split.row()
+            row.alignment = 'RIGHT'
+            row.label(text=f'{stat.calls}')
+            row.label(text=f'{stat.time * 1e3:.2f} ms')
+            row.label(text=f'{stat.rna}')
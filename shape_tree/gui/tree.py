@@ -1,6 +1,9 @@
 
 from typing import TYPE_CHECKING, Iterable
 from bpy.types import UILayout, UIList
+from bpy.props import EnumProperty
+from ..api.node import NODE_TYPE_DATA, NODE_TYPE_INDEX, NODE_TYPE_ITEMS, NODE_TYPE_TABLE
+from ..app.profiling import profiled
 if TYPE_CHECKING:
     from bpy.types import Context
     from ..api.node import ShapeTreeNode
@@ -11,17 +14,32 @@ if TYPE_CHECKING:
 class SHAPETREE_UL_tree(UIList):
     bl_idname = 'SHAPETREE_UL_tree'
 
+    filter_types: EnumProperty(
+        name="Types",
+        description="Node types to show in the list",
+        items=NODE_TYPE_ITEMS,
+        default=set(NODE_TYPE_INDEX),
+        options={'ENUM_FLAG'}
+        )
+
+    @profiled
     def draw_item(self, _0, layout: 'UILayout', _1, node: 'ShapeTreeNode', _2, _3, _4, _5, _6) -> None:
+        from ..app.resolve import node_resolve, node_resolve_shape
         key = node.id_data
+        type = node.type
+        info = node_resolve(node)
 
         split = layout.split(factor=0.5)
         row = split.row(align=True)
 
-        for _ in range(node.depth):
+        depth = node.depth
+        if depth > 0:
             # TODO switch for custom separator icon
-            row.label(icon='BLANK1')
+            sub = row.row(align=True)
+            sub.ui_units_x = depth
+            sub.label(icon='BLANK1')
 
-        if len(node) > 0 or node.type == 'GROUP':
+        if type == 'GROUP' or len(node) > 0:
             row.prop(node, "show_expanded",
                      text="",
                      icon=f'DISCLOSURE_TRI_{"DOWN" if node.show_expanded else "RIGHT"}',
@@ -30,36 +48,40 @@ class SHAPETREE_UL_tree(UIList):
             row.label(icon='BLANK1')
 
         # TODO switch for custom node icon
-        row.prop(node, "name", text="", icon='SHAPEKEY_DATA', emboss=False)
+        row.prop(node, "name", text="", icon='SHAPEKEY_DATA' if node.is_valid else 'ERROR', emboss=False)
 
         row = split.row(align=True)
         # row.enabled = context.object.mode not in ('EDIT', 'SCULPT')
         row.alignment = 'RIGHT'
         row.emboss = 'NONE_OR_STATUS'
 
+        # Generated nodes have no influence or weight of their own, the tree
+        # drives their values and the name icon reports if that is broken.
+        missing = 'BLANK1' if type in NODE_TYPE_DATA else 'ERROR'
+
         sub = row.row(align=True)
         sub.ui_units_x = 4.6
-        
-        data = node.data
-        if data is not None:
-            sub.prop(key, data.influence_property_path, text="", slider=True)
+
+        if info.influence_property_path is not None:
+            sub.prop(key, info.influence_property_path, text="", slider=True)
         else:
-            sub.label(icon='ERROR')
+            sub.label(icon=missing)
 
         sub = row.row(align=True)
         sub.ui_units_x = 2.2
         sub.alignment = 'CENTER'
         # sub.enabled = node.depth > 0
-        if data is not None:
-            sub.prop(key, data.weight_property_path, text="", slider=True)
+        if info.weight_property_path is not None:
+            sub.prop(key, info.weight_property_path, text="", slider=True)
         else:
-            sub.label(icon='ERROR')
+            sub.label(icon=missing)
 
         sub = row.row(align=True)
         sub.ui_units_x = 2.2
         sub.alignment = 'CENTER'
-        if node.type in {'SHAPEKEY', 'INBETWEEN', 'COMBINATION'}:
-            shape = key.key_blocks.get(node.name)
+        if node.is_shape:
+            # Checks the cached index still points at the node's shape key
+            shape = node_resolve_shape(node)
             if shape is not None:
                 sub.prop(shape, "value", text="")
             else:
@@ -67,23 +89,25 @@ class SHAPETREE_UL_tree(UIList):
         else:
             sub.label(icon='BLANK1')
 
-    def filter_items(self, _, tree: 'ShapeTree', prop: str):
-        nodes = getattr(tree, prop)
-        flags = [self.bitflag_filter_item] * len(nodes)
-        order = list(range(len(nodes)))
-        depth = -1
-
-        node: ShapeTreeNode
-        for index, node in enumerate(nodes):
-
-            if depth > -1 and node.depth > depth:
-                flags[index] &= ~self.bitflag_filter_item
-                continue
+    def draw_filter(self, _: 'Context', layout: 'UILayout') -> None:
+        row = layout.row(align=True)
+        row.prop(self, "filter_name", text="")
+        row.prop(self, "use_filter_invert", text="", icon='ARROW_LEFTRIGHT')
 
-            if node.get("length", 0) > 0 and not node.show_expanded:
-                depth = node.depth
-                continue
+        row = layout.row(align=True)
+        row.prop(self, "filter_types", expand=True)
 
-            depth = -1
+    @profiled
+    def filter_items(self, _, tree: 'ShapeTree', prop: str):
+        from ..app.visibility import tree_visibility
+        types = self.filter_types
+        if len(types) < len(NODE_TYPE_INDEX):
+            types = frozenset(NODE_TYPE_TABLE[type] for type in types)
+        else:
+            types = None
+        return tree_visibility(tree,
+                               self.bitflag_filter_item,
+                               self.filter_name,
+                               types,
+                               self.use_filter_invert), []
 
-        return flags, order
\ No newline at end of file
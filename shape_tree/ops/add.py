@@ -2,10 +2,8 @@
 from typing import Set, TYPE_CHECKING
 from bpy.types import Operator
 from bpy.props import StringProperty
-from shape_tree.lib.driver_utils import driver_find
-from ..lib.asks import COMPAT_ENGINES, COMPAT_OBJECTS, idprop_create
-from ..api.node import NODE_TYPE_TABLE, node_name_unique
-from ..app.drivers import is_asks_driver, node_value_driver_create, node_weight_driver_create
+from ..lib.asks import COMPAT_ENGINES, COMPAT_OBJECTS
+from ..api.node import node_index, node_name_unique
 if TYPE_CHECKING:
     from bpy.types import Context
 
@@ -32,6 +30,8 @@ class SHAPETREE_OT_group_add(Operator):
         return False
 
     def execute(self, context: 'Context') -> Set[str]:
+        from ..app.drivers import node_drivers_create
+        from ..app.structure import node_insert
         key = context.object.data.shape_keys
         tree = key.shape_tree
 
@@ -49,25 +49,10 @@ class SHAPETREE_OT_group_add(Operator):
                 self.report({'ERROR'}, f'{self.bl_idname} parent must be a group node')
                 return {'CANCELLED'}
 
-        nodes = tree.collection__internal__
-        node = nodes.add()
-        node["type"] = NODE_TYPE_TABLE['GROUP']
-        node["name"] = node_name_unique(node, "Group")
-
-        idprop_create(key, node.influence_property_name)
-        idprop_create(key, node.weight_property_name)
-        node_weight_driver_create(node, parent)
-
-        if parent is not None:
-            index = parent.subtree[-1].index + 1
-            node["index"] = index
-            node["depth"] = parent.depth + 1
-            nodes.move(len(nodes)-1, index)
-        else:
-            index = len(nodes)-1
-            node["index"] = index
-            node["depth"] = 0
+        node = node_insert(tree, 'GROUP', node_name_unique(tree, "Group"), parent)
+        node_drivers_create(node)
 
+        index = node_index(node)
         tree["active_index"] = index
         return {'FINISHED'}
 
@@ -102,6 +87,8 @@ class SHAPETREE_OT_shapekey_add(Operator):
         return False
 
     def execute(self, context: 'Context') -> Set[str]:
+        from ..app.drivers import node_drivers_create
+        from ..app.structure import node_insert
         object = context.object
         key = object.data.shape_keys
         tree = key.shape_tree
@@ -131,36 +118,89 @@ class SHAPETREE_OT_shapekey_add(Operator):
         else:
             shape = object.shape_key_add()
 
-        nodes = tree.collection__internal__
-        node = nodes.add()
-        node["type"] = NODE_TYPE_TABLE['SHAPEKEY']
-        node["name"] = shape.name
-
-        idprop_create(key, node.influence_property_name)
-        idprop_create(key, node.weight_property_name)
-        node_weight_driver_create(node, parent)
-
-        fcurve = driver_find(key, f'key_blocks["{shape.name}"].value')
-        if fcurve is None:
-            node_value_driver_create(node)
-        elif not is_asks_driver(fcurve):
-            fcurve.data_path = node.influence_property_path
-
-        if parent is not None:
-            index = parent.subtree[-1].index + 1
-            node["index"] = index
-            node["depth"] = parent.depth + 1
-            nodes.move(len(nodes)-1, index)
-        else:
-            index = len(nodes)-1
-            node["index"] = index
-            node["depth"] = 0
+        node = node_insert(tree, 'SHAPEKEY', shape.name, parent)
+        node_drivers_create(node)
 
+        index = node_index(node)
         object.active_shape_key_index = key.key_blocks.find(shape.name)
         tree["active_index"] = index
         return {'FINISHED'}
 
 
+class SHAPETREE_OT_nodes_add(Operator):
+
+    bl_idname = "shape_tree.nodes_add"
+    bl_label = "Add Nodes"
+    bl_description="Add multiple nodes from a JSON spec of groups and shape keys"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filepath: StringProperty(
+        name="File Path",
+        description="JSON file to read the spec from (optional)",
+        subtype='FILE_PATH',
+        default="",
+        options=set()
+        )
+
+    parent: StringProperty(
+        name="Parent",
+        description="Name of the parent node to add nodes to",
+        default="",
+        options=set()
+        )
+
+    spec: StringProperty(
+        name="Spec",
+        description="JSON spec of the nodes to add",
+        default="",
+        options=set()
+        )
+
+    @classmethod
+    def poll(cls, context: 'Context') -> bool:
+        if context.engine in COMPAT_ENGINES:
+            object = context.object
+            if object is not None and object.type in COMPAT_OBJECTS:
+                return object.data.shape_keys is not None
+        return False
+
+    def execute(self, context: 'Context') -> Set[str]:
+        object = context.object
+        tree = object.data.shape_keys.shape_tree
+
+        parent = self.parent
+        if not parent:
+            parent = None
+        else:
+            parent = tree.get(parent)
+
+            if parent is None:
+                self.report({'ERROR'}, f'{self.bl_idname} parent "{self.parent}" not found')
+                return {'CANCELLED'}
+
+        import json
+        try:
+            if self.filepath:
+                with open(self.filepath) as file:
+                    spec = json.load(file)
+            else:
+                spec = json.loads(self.spec)
+        except (OSError, ValueError) as error:
+            self.report({'ERROR'}, f'{self.bl_idname} failed to read spec: {error}')
+            return {'CANCELLED'}
+
+        try:
+            nodes = tree.add_nodes(spec, parent, object)
+        except (TypeError, ValueError) as error:
+            self.report({'ERROR'}, f'{self.bl_idname} {error}')
+            return {'CANCELLED'}
+
+        if nodes:
+            tree["active_index"] = nodes[0].index
+
+        return {'FINISHED'}
+
+
 class SHAPETREE_OT_node_add(Operator):
 
     bl_idname = "shape_tree.node_add"
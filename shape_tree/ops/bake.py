@@ -0,0 +1,96 @@
+from typing import Set, TYPE_CHECKING
+from bpy.types import Operator
+from bpy.props import BoolProperty, FloatProperty, IntProperty
+from ..lib.asks import COMPAT_ENGINES, COMPAT_OBJECTS
+if TYPE_CHECKING:
+    from bpy.types import Context, Event
+
+
+class SHAPETREE_OT_bake(Operator):
+
+    bl_idname = "shape_tree.bake"
+    bl_label = "Bake Shape Keys"
+    bl_description="Bake the shape key values the tree produces over a frame range to keyframes"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    frame_start: IntProperty(
+        name="Start Frame",
+        description="First frame to bake",
+        default=1,
+        options=set()
+        )
+
+    frame_end: IntProperty(
+        name="End Frame",
+        description="Last frame to bake",
+        default=250,
+        options=set()
+        )
+
+    step: IntProperty(
+        name="Frame Step",
+        description="Number of frames between baked keyframes",
+        min=1,
+        default=1,
+        options=set()
+        )
+
+    reduce: BoolProperty(
+        name="Reduce Keyframes",
+        description="Remove keyframes that linear interpolation of their neighbours reproduces",
+        default=True,
+        options=set()
+        )
+
+    tolerance: FloatProperty(
+        name="Tolerance",
+        description="Largest difference in value allowed when removing keyframes",
+        min=0.0,
+        default=0.0001,
+        precision=5,
+        options=set()
+        )
+
+    mute_drivers: BoolProperty(
+        name="Mute Drivers",
+        description="Mute the shape key value drivers so that the baked keyframes take effect",
+        default=True,
+        options=set()
+        )
+
+    @classmethod
+    def poll(cls, context: 'Context') -> bool:
+        if context.engine in COMPAT_ENGINES:
+            object = context.object
+            if object is not None and object.type in COMPAT_OBJECTS:
+                key = object.data.shape_keys
+                return key is not None and len(key.shape_tree.collection__internal__) > 0
+        return False
+
+    def invoke(self, context: 'Context', _: 'Event') -> Set[str]:
+        scene = context.scene
+        self.frame_start = scene.frame_start
+        self.frame_end = scene.frame_end
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context: 'Context') -> Set[str]:
+        from ..app.bake import tree_bake
+
+        if self.frame_end < self.frame_start:
+            self.report({'ERROR'}, f'{self.bl_idname} end frame is before start frame')
+            return {'CANCELLED'}
+
+        tree = context.object.data.shape_keys.shape_tree
+        result = tree_bake(tree,
+                           self.frame_start,
+                           self.frame_end,
+                           self.step,
+                           self.reduce,
+                           self.tolerance,
+                           self.mute_drivers)
+
+        if result.driven:
+            self.report({'WARNING'}, f'{result.driven} node influences are driven and were baked at their current value')
+
+        self.report({'INFO'}, f'Baked {result.keyframes} keyframes for {result.shapes} shape keys')
+        return {'FINISHED'}
@@ -0,0 +1,48 @@
+from typing import Set, TYPE_CHECKING
+from bpy.types import Operator
+from bpy.props import BoolProperty
+from ..lib.asks import COMPAT_ENGINES, COMPAT_OBJECTS
+if TYPE_CHECKING:
+    from bpy.types import Context
+
+
+class SHAPETREE_OT_drivers_convert(Operator):
+
+    bl_idname = "shape_tree.drivers_convert"
+    bl_label = "Convert Drivers"
+    bl_description="Convert legacy node drivers to driver types Blender evaluates without Python"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    all_trees: BoolProperty(
+        name="All Trees",
+        description="Convert the drivers of every shape tree in the file",
+        default=False,
+        options=set()
+        )
+
+    @classmethod
+    def poll(cls, context: 'Context') -> bool:
+        if context.engine in COMPAT_ENGINES:
+            object = context.object
+            if object is not None and object.type in COMPAT_OBJECTS:
+                return object.data.shape_keys is not None
+        return False
+
+    def execute(self, context: 'Context') -> Set[str]:
+        from ..app.drivers import tree_drivers_convert
+        if self.all_trees:
+            from bpy import data
+            keys = [key for key in data.shape_keys if key.library is None]
+        else:
+            keys = [context.object.data.shape_keys]
+
+        audited = 0
+        converted = 0
+
+        for key in keys:
+            result = tree_drivers_convert(key.shape_tree)
+            audited += result[0]
+            converted += result[1]
+
+        self.report({'INFO'}, f'Converted {converted} of {audited} shape tree drivers')
+        return {'FINISHED'}
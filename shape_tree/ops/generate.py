@@ -0,0 +1,197 @@
+from typing import Optional, Set, TYPE_CHECKING
+from bpy.types import Operator
+from bpy.props import IntProperty, StringProperty
+from ..lib.asks import COMPAT_ENGINES, COMPAT_OBJECTS
+from ..api.node import NODE_TYPE_CHILD, NODE_TYPE_VALID
+if TYPE_CHECKING:
+    from bpy.types import Context, Event, Key
+    from ..api.node import ShapeTreeNode
+
+
+def generate_poll(context: 'Context', type: str) -> bool:
+    if context.engine in COMPAT_ENGINES:
+        object = context.object
+        if object is not None and object.type in COMPAT_OBJECTS:
+            key = object.data.shape_keys
+            return (key is not None
+                    and len(key.shape_tree.collection__internal__) > 0
+                    and NODE_TYPE_VALID[type](key))
+    return False
+
+
+def generate_node(operator: Operator, key: 'Key') -> Optional['ShapeTreeNode']:
+    # The named node, or the active node if no name is given
+    tree = key.shape_tree
+    node = tree.get(operator.node) if operator.node else tree.active
+    if node is None:
+        operator.report({'ERROR'}, f'{operator.bl_idname} node "{operator.node}" not found')
+    elif node.shape is None:
+        operator.report({'ERROR'}, f'{operator.bl_idname} node "{node.name}" has no shape key')
+        node = None
+    return node
+
+
+class SHAPETREE_OT_combinations_add(Operator):
+
+    bl_idname = "shape_tree.combinations_add"
+    bl_label = "Add Combinations"
+    bl_description="Add a combination corrective for every pair of shape key nodes that move the same vertices"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    root: StringProperty(
+        name="Root",
+        description="Name of the group whose shape key nodes are combined (optional)",
+        default="",
+        options=set()
+        )
+
+    pattern: StringProperty(
+        name="Pattern",
+        description="Only combine shape key nodes whose names match (optional)",
+        default="",
+        options=set()
+        )
+
+    min_vertices: IntProperty(
+        name="Minimum Vertices",
+        description="Number of vertices both shapes must move to be combined",
+        min=1,
+        default=1,
+        options=set()
+        )
+
+    @classmethod
+    def poll(cls, context: 'Context') -> bool:
+        return generate_poll(context, 'COMBINATION')
+
+    def invoke(self, context: 'Context', _: 'Event') -> Set[str]:
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context: 'Context') -> Set[str]:
+        from ..app.generate import tree_combinations_add
+        from ..app.model import name_matcher
+        object = context.object
+        tree = object.data.shape_keys.shape_tree
+
+        root = self.root
+        if not root:
+            nodes = tree.collection__internal__[:]
+        else:
+            root = tree.get(root)
+
+            if root is None:
+                self.report({'ERROR'}, f'{self.bl_idname} root "{self.root}" not found')
+                return {'CANCELLED'}
+
+            nodes = root.subtree
+
+        match = name_matcher(self.pattern) if self.pattern else None
+        nodes = [node for node in nodes
+                 if node.type == 'SHAPEKEY'
+                 and node.shape is not None
+                 and (match is None or match(node.name.lower()))]
+
+        if len(nodes) < 2:
+            self.report({'ERROR'}, f'{self.bl_idname} needs at least two shape key nodes')
+            return {'CANCELLED'}
+
+        try:
+            added = tree_combinations_add(tree, object, nodes, self.min_vertices)
+        except ValueError as error:
+            self.report({'ERROR'}, f'{self.bl_idname} {error}')
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, f'Added {len(added)} combinations')
+        return {'FINISHED'}
+
+
+class SHAPETREE_OT_xyz_split(Operator):
+
+    bl_idname = "shape_tree.xyz_split"
+    bl_label = "Split XYZ"
+    bl_description="Split a shape into one shape per axis"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    node: StringProperty(
+        name="Node",
+        description="Name of the node to split, the active node if empty",
+        default="",
+        options=set()
+        )
+
+    @classmethod
+    def poll(cls, context: 'Context') -> bool:
+        return generate_poll(context, 'XYZ')
+
+    def execute(self, context: 'Context') -> Set[str]:
+        from ..app.generate import node_xyz_split
+        object = context.object
+        key = object.data.shape_keys
+
+        node = generate_node(self, key)
+        if node is None:
+            return {'CANCELLED'}
+
+        parent = node.parent
+        if parent is not None and 'XYZ' not in NODE_TYPE_CHILD[parent.type]:
+            self.report({'ERROR'}, f'{self.bl_idname} a {parent.type} node cannot hold XYZ nodes')
+            return {'CANCELLED'}
+
+        try:
+            added = node_xyz_split(key.shape_tree, object, node)
+        except ValueError as error:
+            self.report({'ERROR'}, f'{self.bl_idname} {error}')
+            return {'CANCELLED'}
+
+        key.shape_tree["active_index"] = added[0].index
+        return {'FINISHED'}
+
+
+class SHAPETREE_OT_inbetweens_add(Operator):
+
+    bl_idname = "shape_tree.inbetweens_add"
+    bl_label = "Add In-Betweens"
+    bl_description="Add evenly spaced in-between shapes under a node"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    count: IntProperty(
+        name="Count",
+        description="Number of in-betweens to add",
+        min=1,
+        max=16,
+        default=1,
+        options=set()
+        )
+
+    node: StringProperty(
+        name="Node",
+        description="Name of the node to add in-betweens to, the active node if empty",
+        default="",
+        options=set()
+        )
+
+    @classmethod
+    def poll(cls, context: 'Context') -> bool:
+        return generate_poll(context, 'INBETWEEN')
+
+    def execute(self, context: 'Context') -> Set[str]:
+        from ..app.generate import node_inbetweens_add
+        object = context.object
+        key = object.data.shape_keys
+
+        node = generate_node(self, key)
+        if node is None:
+            return {'CANCELLED'}
+
+        if 'INBETWEEN' not in NODE_TYPE_CHILD[node.type]:
+            self.report({'ERROR'}, f'{self.bl_idname} a {node.type} node cannot hold in-betweens')
+            return {'CANCELLED'}
+
+        try:
+            added = node_inbetweens_add(key.shape_tree, object, node, self.count)
+        except ValueError as error:
+            self.report({'ERROR'}, f'{self.bl_idname} {error}')
+            return {'CANCELLED'}
+
+        key.shape_tree["active_index"] = added[0].index
+        return {'FINISHED'}
@@ -0,0 +1,112 @@
+from typing import Set, TYPE_CHECKING
+from bpy.types import Operator
+from bpy.props import EnumProperty, StringProperty
+from ..lib.asks import COMPAT_ENGINES, COMPAT_OBJECTS
+if TYPE_CHECKING:
+    from bpy.types import Context
+
+
+class SHAPETREE_OT_node_move(Operator):
+
+    bl_idname = "shape_tree.node_move"
+    bl_label = "Move"
+    bl_description="Move a node and its descendants past its previous or next sibling"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    direction: EnumProperty(
+        name="Direction",
+        items=[
+            ('UP', "Up", "Move the node before its previous sibling"),
+            ('DOWN', "Down", "Move the node after its next sibling"),
+            ],
+        default='UP',
+        options=set()
+        )
+
+    node: StringProperty(
+        name="Node",
+        description="Name of the node to move (defaults to the active node)",
+        default="",
+        options=set()
+        )
+
+    @classmethod
+    def poll(cls, context: 'Context') -> bool:
+        if context.engine in COMPAT_ENGINES:
+            object = context.object
+            if object is not None and object.type in COMPAT_OBJECTS:
+                key = object.data.shape_keys
+                return key is not None and len(key.shape_tree.collection__internal__) > 1
+        return False
+
+    def execute(self, context: 'Context') -> Set[str]:
+        from ..app.structure import node_move
+        tree = context.object.data.shape_keys.shape_tree
+
+        node = tree.get(self.node) if self.node else tree.active
+        if node is None:
+            self.report({'ERROR'}, f'{self.bl_idname} node "{self.node}" not found')
+            return {'CANCELLED'}
+
+        node = node_move(tree, node, self.direction)
+        tree["active_index"] = node.index
+        return {'FINISHED'}
+
+
+class SHAPETREE_OT_node_reparent(Operator):
+
+    bl_idname = "shape_tree.node_reparent"
+    bl_label = "Reparent"
+    bl_description="Move a node and its descendants to a new parent"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    node: StringProperty(
+        name="Node",
+        description="Name of the node to move (defaults to the active node)",
+        default="",
+        options=set()
+        )
+
+    parent: StringProperty(
+        name="Parent",
+        description="Name of the new parent node (leave empty to move to the top level)",
+        default="",
+        options=set()
+        )
+
+    @classmethod
+    def poll(cls, context: 'Context') -> bool:
+        if context.engine in COMPAT_ENGINES:
+            object = context.object
+            if object is not None and object.type in COMPAT_OBJECTS:
+                key = object.data.shape_keys
+                return key is not None and len(key.shape_tree.collection__internal__) > 0
+        return False
+
+    def execute(self, context: 'Context') -> Set[str]:
+        from ..app.structure import node_reparent
+        tree = context.object.data.shape_keys.shape_tree
+
+        node = tree.get(self.node) if self.node else tree.active
+        if node is None:
+            self.report({'ERROR'}, f'{self.bl_idname} node "{self.node}" not found')
+            return {'CANCELLED'}
+
+        parent = self.parent
+        if not parent:
+            parent = None
+        else:
+            parent = tree.get(parent)
+
+            if parent is None:
+                self.report({'ERROR'}, f'{self.bl_idname} parent "{self.parent}" not found')
+                return {'CANCELLED'}
+
+        try:
+            node = node_reparent(tree, node, parent)
+        except ValueError as error:
+            self.report({'ERROR'}, f'{self.bl_idname} {error}')
+            return {'CANCELLED'}
+
+        tree["active_index"] = node.index
+        return {'FINISHED'}
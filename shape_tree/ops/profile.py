@@ -0,0 +1,78 @@
+from typing import Set, TYPE_CHECKING
+from bpy.types import Operator
+from bpy.props import BoolProperty
+from ..app.profiling import (profile_clear,
+                             profile_disable,
+                             profile_enable,
+                             profile_enabled,
+                             profile_records,
+                             profile_report)
+if TYPE_CHECKING:
+    from bpy.types import Context
+
+PROFILE_TEXT_NAME = "Shape Tree Profile"
+
+
+class SHAPETREE_OT_profile_toggle(Operator):
+
+    bl_idname = "shape_tree.profile_toggle"
+    bl_label = "Toggle Profiling"
+    bl_description="Start or stop recording the time spent in instrumented shape tree functions"
+    bl_options = {'INTERNAL'}
+
+    rna: BoolProperty(
+        name="Count RNA Calls",
+        description="Also count calls into Blender data (slows down everything while recording)",
+        default=False,
+        options=set()
+        )
+
+    def execute(self, _: 'Context') -> Set[str]:
+        if profile_enabled():
+            profile_disable()
+        else:
+            profile_enable(self.rna)
+        return {'FINISHED'}
+
+
+class SHAPETREE_OT_profile_report(Operator):
+
+    bl_idname = "shape_tree.profile_report"
+    bl_label = "Profile Report"
+    bl_description="Write the recorded profile to the console and a text data-block"
+    bl_options = {'INTERNAL'}
+
+    clear: BoolProperty(
+        name="Clear",
+        description="Discard the recorded profile after writing the report",
+        default=False,
+        options=set()
+        )
+
+    def execute(self, _: 'Context') -> Set[str]:
+        from bpy import data
+        report = profile_report()
+        records = profile_records()
+
+        lines = [f'{"Function":<48}{"Calls":>10}{"Total ms":>12}{"Mean us":>12}{"RNA":>10}']
+        for name, stat in report:
+            lines.append(f'{name:<48}{stat.calls:>10}{stat.time * 1e3:>12.3f}'
+                         f'{stat.time * 1e6 / stat.calls:>12.1f}{stat.rna:>10}')
+
+        if records:
+            lines.append("")
+            lines.append(f'Last {len(records)} calls (slowest 20)')
+            for record in sorted(records, key=lambda record: record.duration, reverse=True)[:20]:
+                lines.append(f'{record.name:<48}{record.duration * 1e6:>12.1f} us{record.rna:>10}')
+
+        text = "\n".join(lines)
+        print(text)
+
+        block = data.texts.get(PROFILE_TEXT_NAME) or data.texts.new(PROFILE_TEXT_NAME)
+        block.from_string(text)
+
+        if self.clear:
+            profile_clear()
+
+        self.report({'INFO'}, f'Profiled {len(report)} functions, see "{PROFILE_TEXT_NAME}"')
+        return {'FINISHED'}
@@ -0,0 +1,53 @@
+from typing import Set, TYPE_CHECKING
+from bpy.types import Operator
+from bpy.props import BoolProperty, StringProperty
+from ..lib.asks import COMPAT_ENGINES, COMPAT_OBJECTS
+from ..api.node import node_index
+if TYPE_CHECKING:
+    from bpy.types import Context
+
+
+class SHAPETREE_OT_node_remove(Operator):
+
+    bl_idname = "shape_tree.node_remove"
+    bl_label = "Remove"
+    bl_description="Remove a node and all of its descendants"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    node: StringProperty(
+        name="Node",
+        description="Name of the node to remove (defaults to the active node)",
+        default="",
+        options=set()
+        )
+
+    remove_shape_keys: BoolProperty(
+        name="Remove Shape Keys",
+        description="Also remove the shape keys of the removed shape key nodes",
+        default=False,
+        options=set()
+        )
+
+    @classmethod
+    def poll(cls, context: 'Context') -> bool:
+        if context.engine in COMPAT_ENGINES:
+            object = context.object
+            if object is not None and object.type in COMPAT_OBJECTS:
+                key = object.data.shape_keys
+                return key is not None and len(key.shape_tree.collection__internal__) > 0
+        return False
+
+    def execute(self, context: 'Context') -> Set[str]:
+        from ..app.structure import node_remove
+        object = context.object
+        tree = object.data.shape_keys.shape_tree
+
+        node = tree.get(self.node) if self.node else tree.active
+        if node is None:
+            self.report({'ERROR'}, f'{self.bl_idname} node "{self.node}" not found')
+            return {'CANCELLED'}
+
+        index = node_index(node)
+        node_remove(tree, node, object if self.remove_shape_keys else None)
+        tree["active_index"] = max(0, min(index, len(tree.collection__internal__) - 1))
+        return {'FINISHED'}
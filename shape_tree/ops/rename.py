@@ -0,0 +1,96 @@
+import re
+from typing import Set, TYPE_CHECKING
+from bpy.types import Operator
+from bpy.props import EnumProperty, StringProperty
+from ..lib.asks import COMPAT_ENGINES, COMPAT_OBJECTS
+from ..api.node import NODE_TYPE_INDEX, NODE_TYPE_ITEMS
+if TYPE_CHECKING:
+    from bpy.types import Context, Event
+
+RENAME_MODE_ITEMS = [
+    ('WILDCARD', "Wildcard", "Match whole names, each * or ? in the replacement takes the text matched by the pattern"),
+    ('REGEX', "Regular Expression", "Replace every match of a regular expression"),
+    ]
+
+
+class SHAPETREE_OT_nodes_rename(Operator):
+
+    bl_idname = "shape_tree.nodes_rename"
+    bl_label = "Rename Nodes"
+    bl_description="Rename every node in the tree or a subtree that matches a pattern"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    mode: EnumProperty(
+        name="Mode",
+        description="How the pattern is matched",
+        items=RENAME_MODE_ITEMS,
+        default='WILDCARD',
+        options=set()
+        )
+
+    pattern: StringProperty(
+        name="Pattern",
+        description="Pattern node names are matched against",
+        default="",
+        options=set()
+        )
+
+    replacement: StringProperty(
+        name="Replacement",
+        description="New name for matching nodes",
+        default="",
+        options=set()
+        )
+
+    root: StringProperty(
+        name="Root",
+        description="Name of the node whose subtree is renamed (optional)",
+        default="",
+        options=set()
+        )
+
+    types: EnumProperty(
+        name="Types",
+        description="Types of node to rename",
+        items=NODE_TYPE_ITEMS,
+        default=set(NODE_TYPE_INDEX),
+        options={'ENUM_FLAG'}
+        )
+
+    @classmethod
+    def poll(cls, context: 'Context') -> bool:
+        if context.engine in COMPAT_ENGINES:
+            object = context.object
+            if object is not None and object.type in COMPAT_OBJECTS:
+                key = object.data.shape_keys
+                return key is not None and len(key.shape_tree.collection__internal__) > 0
+        return False
+
+    def invoke(self, context: 'Context', _: 'Event') -> Set[str]:
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context: 'Context') -> Set[str]:
+        tree = context.object.data.shape_keys.shape_tree
+
+        if not self.pattern:
+            self.report({'ERROR'}, f'{self.bl_idname} pattern is empty')
+            return {'CANCELLED'}
+
+        root = self.root
+        if not root:
+            root = None
+        else:
+            root = tree.get(root)
+
+            if root is None:
+                self.report({'ERROR'}, f'{self.bl_idname} root "{self.root}" not found')
+                return {'CANCELLED'}
+
+        try:
+            renamed = tree.rename_nodes(self.pattern, self.replacement, self.mode, root, self.types)
+        except (re.error, ValueError) as error:
+            self.report({'ERROR'}, f'{self.bl_idname} {error}')
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, f'Renamed {len(renamed)} nodes')
+        return {'FINISHED'}
@@ -0,0 +1,115 @@
+from typing import Set, TYPE_CHECKING
+from bpy.types import Operator
+from bpy.props import BoolProperty, StringProperty
+from bpy_extras.io_utils import ExportHelper, ImportHelper
+from ..lib.asks import COMPAT_ENGINES, COMPAT_OBJECTS
+if TYPE_CHECKING:
+    from bpy.types import Context
+
+
+class SHAPETREE_OT_snapshot_export(Operator, ExportHelper):
+
+    bl_idname = "shape_tree.snapshot_export"
+    bl_label = "Export Shape Tree"
+    bl_description="Export the shape tree and optionally its shape key deltas to a snapshot file"
+    bl_options = {'REGISTER'}
+
+    filename_ext = ".shtree"
+
+    filter_glob: StringProperty(
+        default="*.shtree",
+        options={'HIDDEN'}
+        )
+
+    include_deltas: BoolProperty(
+        name="Include Shapes",
+        description="Store the shape key deltas of shape key nodes",
+        default=True,
+        options=set()
+        )
+
+    @classmethod
+    def poll(cls, context: 'Context') -> bool:
+        if context.engine in COMPAT_ENGINES:
+            object = context.object
+            if object is not None and object.type in COMPAT_OBJECTS:
+                key = object.data.shape_keys
+                return key is not None and len(key.shape_tree.collection__internal__) > 0
+        return False
+
+    def execute(self, context: 'Context') -> Set[str]:
+        from ..app.snapshot import tree_snapshot_write
+        tree = context.object.data.shape_keys.shape_tree
+
+        try:
+            count = tree_snapshot_write(tree, self.filepath, self.include_deltas)
+        except OSError as error:
+            self.report({'ERROR'}, f'{self.bl_idname} {error}')
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, f'Exported {count} shape tree nodes')
+        return {'FINISHED'}
+
+
+class SHAPETREE_OT_snapshot_import(Operator, ImportHelper):
+
+    bl_idname = "shape_tree.snapshot_import"
+    bl_label = "Import Shape Tree"
+    bl_description="Import nodes and shape keys from a shape tree snapshot file"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filename_ext = ".shtree"
+
+    filter_glob: StringProperty(
+        default="*.shtree",
+        options={'HIDDEN'}
+        )
+
+    apply_deltas: BoolProperty(
+        name="Import Shapes",
+        description="Write the stored shape key deltas to the imported shape keys",
+        default=True,
+        options=set()
+        )
+
+    parent: StringProperty(
+        name="Parent",
+        description="Name of the parent node to import nodes into",
+        default="",
+        options=set()
+        )
+
+    @classmethod
+    def poll(cls, context: 'Context') -> bool:
+        if context.engine in COMPAT_ENGINES:
+            object = context.object
+            if object is not None and object.type in COMPAT_OBJECTS:
+                return object.data.shape_keys is not None
+        return False
+
+    def execute(self, context: 'Context') -> Set[str]:
+        from ..app.snapshot import tree_snapshot_read
+        object = context.object
+        tree = object.data.shape_keys.shape_tree
+
+        parent = self.parent
+        if not parent:
+            parent = None
+        else:
+            parent = tree.get(parent)
+
+            if parent is None:
+                self.report({'ERROR'}, f'{self.bl_idname} parent "{self.parent}" not found')
+                return {'CANCELLED'}
+
+        try:
+            nodes = tree_snapshot_read(tree, self.filepath, parent, object, self.apply_deltas)
+        except (OSError, ValueError) as error:
+            self.report({'ERROR'}, f'{self.bl_idname} {error}')
+            return {'CANCELLED'}
+
+        if nodes:
+            tree["active_index"] = nodes[0].index
+
+        self.report({'INFO'}, f'Imported {len(nodes)} shape tree nodes')
+        return {'FINISHED'}
@@ -0,0 +1,56 @@
+from typing import Set, TYPE_CHECKING
+from bpy.types import Operator
+from bpy.props import BoolProperty
+from ..lib.asks import COMPAT_ENGINES, COMPAT_OBJECTS
+if TYPE_CHECKING:
+    from bpy.types import Context
+
+# Issues listed individually in the info log, the rest are only counted
+VALIDATE_REPORT_LIMIT = 50
+
+
+class SHAPETREE_OT_validate(Operator):
+
+    bl_idname = "shape_tree.validate"
+    bl_label = "Validate"
+    bl_description="Check shape trees for missing shape keys, properties and drivers and inconsistent indices"
+    bl_options = {'REGISTER'}
+
+    all_trees: BoolProperty(
+        name="All Trees",
+        description="Validate every shape tree in the file",
+        default=False,
+        options=set()
+        )
+
+    @classmethod
+    def poll(cls, context: 'Context') -> bool:
+        if context.engine in COMPAT_ENGINES:
+            object = context.object
+            if object is not None and object.type in COMPAT_OBJECTS:
+                return object.data.shape_keys is not None
+        return False
+
+    def execute(self, context: 'Context') -> Set[str]:
+        from ..app.validation import tree_validate
+        if self.all_trees:
+            from bpy import data
+            keys = [key for key in data.shape_keys if key.library is None]
+        else:
+            keys = [context.object.data.shape_keys]
+
+        errors = 0
+        warnings = 0
+
+        for key in keys:
+            for issue in tree_validate(key.shape_tree):
+                if errors + warnings < VALIDATE_REPORT_LIMIT:
+                    self.report({'WARNING'}, f'{key.name}: {issue.severity} {issue.node}: {issue.message} ({issue.code})')
+                if issue.severity == 'ERROR':
+                    errors += 1
+                else:
+                    warnings += 1
+
+        self.report({'WARNING'} if errors or warnings else {'INFO'},
+                    f'Found {errors} errors and {warnings} warnings in {len(keys)} shape trees')
+        return {'FINISHED'}